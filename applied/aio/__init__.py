@@ -0,0 +1,13 @@
+__all__ = ('AsyncClient', 'AsyncApiSession', 'AsyncPortalSession')
+
+try:
+    import aiohttp  # noqa: F401
+except ImportError:
+    from ..error import MissingDependency
+
+    raise MissingDependency(
+        'aiohttp is not installed, install applied[aio] to use applied.aio'
+    )
+
+from .client import AsyncClient  # noqa: E402
+from .interface import AsyncApiSession, AsyncPortalSession  # noqa: E402
@@ -0,0 +1,49 @@
+from ..client import Client
+
+from .interface import AsyncApiSession, AsyncPortalSession
+from .models import AsyncModel, mixins
+
+
+class AsyncClient(Client):
+    '''Client whose delegated models expose awaitable network methods
+
+    e.g.:
+        async with AsyncClient(api_session=AsyncApiSession(token)) as client:
+            device = await client.Device.get(pk)
+            async for profile in await client.Profile.find(limit=200):
+                ...
+    '''
+
+    def __init__(
+        self,
+        portal_session: AsyncPortalSession = None,
+        api_session: AsyncApiSession = None,
+        codec=None,
+        identity_map: bool = False,
+        compact: bool = False,
+        lazy_attributes: bool = False,
+        model_cache=None,
+    ):
+        super().__init__(
+            portal_session,
+            api_session,
+            codec,
+            identity_map,
+            compact,
+            lazy_attributes=lazy_attributes,
+            model_cache=model_cache,
+        )
+
+    def get_model_mixins(self, model):
+        return (mixins.get(model.TYPE, AsyncModel),)
+
+    async def close(self):
+        for session in (self.portal_session, self.api_session):
+            if session is not None:
+                await session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
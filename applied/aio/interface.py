@@ -0,0 +1,406 @@
+import asyncio
+from http.cookies import Morsel
+from time import monotonic, perf_counter
+from typing import Callable
+from urllib.parse import urlsplit
+
+import aiohttp
+from yarl import URL
+
+from .. import error
+from ..codec import Codec, get_codec
+from ..interface import (
+    ApiSession,
+    PortalSession,
+    RateLimiter,
+    ResponseCache,
+    RetryPolicy,
+    SingleFlight,
+)
+from ..interface.base import BaseInterface
+from ..interface.metrics import Hooks
+
+
+class AsyncRequest:
+    ''' what handle_resp needs to know about the sent request '''
+
+    def __init__(self, method, url, body=None):
+        self.method = method
+        self.url = url
+        self.body = body
+        parts = urlsplit(url)
+        self.path_url = parts.path + (f'?{parts.query}' if parts.query else '')
+
+
+class AsyncResponse:
+    ''' fully read aiohttp response with the requests.Response interface '''
+
+    def __init__(self, request, status_code, headers, content, codec=None):
+        self.request = request
+        self.url = request.url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = 'utf-8'
+        # of the session, json decodes as load_json does
+        self.codec = codec or get_codec()
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    def json(self):
+        return self.codec.loads(self.content)
+
+    def __repr__(self):
+        return f'<Response [{self.status_code}]>'
+
+
+class AsyncBaseInterface(BaseInterface):
+
+    POOL_SIZE = 100
+    # no per host cap unless asked, api calls all go to the same host
+    POOL_MAXSIZE = 0
+
+    def __init__(
+        self,
+        pool_size: int = None,
+        pool_maxsize: int = None,
+        rate_limiter: RateLimiter = None,
+        retry_policy: RetryPolicy = None,
+        single_flight: SingleFlight = None,
+        response_cache: ResponseCache = None,
+        codec: Codec = None,
+        hooks: Hooks = None,
+    ):
+        # aiohttp wants its session created inside a running loop
+        self.session = None
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        # coalesces on the event loop only, its backend is not used here
+        self.single_flight = single_flight
+        self.response_cache = response_cache
+        self.codec = get_codec(codec)
+        self.hooks = hooks
+        self.pool_size = pool_size or self.POOL_SIZE
+        self.pool_maxsize = pool_maxsize or self.POOL_MAXSIZE
+        self.headers = {}
+        self.generation = 0
+        self.renew_lock = None
+
+    def get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_size, limit_per_host=self.pool_maxsize,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.TIMEOUT),
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    async def renew_session(self):
+        raise NotImplementedError
+
+    async def run_sync(self, func, *args):
+        return await asyncio.get_event_loop().run_in_executor(
+            None, func, *args
+        )
+
+    async def prepare_headers(self, headers):
+        return headers
+
+    async def renew(self, generation):
+        if self.renew_lock is None:
+            self.renew_lock = asyncio.Lock()
+        async with self.renew_lock:
+            if generation != self.generation:
+                # renewed by a concurrent request while this one was waiting
+                return True
+            renewed = await self.renew_session()
+            if renewed:
+                self.generation += 1
+            if self.hooks is not None:
+                self.hooks.on_renew(bool(renewed))
+            return renewed
+
+    async def call_limiter(self, func, *args):
+        ''' keep the i/o of a shared rate limiter off the event loop '''
+        if self.rate_limiter.backend.BLOCKING:
+            return await self.run_sync(func, *args)
+        return func(*args)
+
+    async def throttle(self):
+        if self.rate_limiter is None:
+            return
+        wait = await self.call_limiter(self.rate_limiter.reserve)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = await self.call_limiter(self.rate_limiter.reserve)
+
+    async def track_resp(self, resp):
+        if self.rate_limiter is not None:
+            await self.call_limiter(self.rate_limiter.update, resp)
+
+    async def send(self, method, url, **kwargs):
+        timeout = kwargs.pop('timeout', None)
+        if timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+        headers = await self.prepare_headers(
+            {**self.headers, **(kwargs.pop('headers', None) or {})}
+        )
+        await self.throttle()
+        hooks = self.hooks
+        if hooks is not None:
+            hooks.pre_request(method, url)
+            started = perf_counter()
+        async with self.get_session().request(
+            method, url, headers=headers, **kwargs
+        ) as resp:
+            content = await resp.read()
+        data = kwargs.get('data')
+        resp = AsyncResponse(
+            AsyncRequest(
+                method,
+                str(resp.url),
+                data if isinstance(data, (bytes, str)) else None,
+            ),
+            resp.status,
+            resp.headers,
+            content,
+            self.codec,
+        )
+        if hooks is not None:
+            hooks.post_response(method, url, resp, perf_counter() - started)
+        return resp
+
+    async def request(self, method, path, retry=None, **kwargs):
+        if method == 'GET' or self.response_cache is None:
+            return await self.send_request(method, path, retry, **kwargs)
+        try:
+            resp = await self.send_request(method, path, retry, **kwargs)
+        except Exception:
+            self.invalidate_cached(path)
+            raise
+        self.invalidate_cached(path)
+        return resp
+
+    async def send_request(self, method, path, retry=None, **kwargs):
+        url = self.ensure_url(path)
+        body = kwargs.pop('json', None)
+        if body is not None:
+            kwargs['data'] = self.codec.dumps(body)
+            kwargs['headers'] = {
+                **(kwargs.get('headers') or {}),
+                'Content-Type': 'application/json',
+            }
+        policy = self.retry_policy
+        started = monotonic()
+        # a timeout in seconds caps the whole call, waits and resends included
+        limit = kwargs.get('timeout')
+        attempt = retrying = 1
+        while 1:
+            generation = self.generation
+            if limit is not None:
+                left = limit - (monotonic() - started)
+                if left <= 0:
+                    raise asyncio.TimeoutError()
+                kwargs['timeout'] = left
+            try:
+                resp = await self.send(method, url, **kwargs)
+            except aiohttp.ClientConnectionError:
+                delay = policy.get_delay(
+                    method, attempt, started, retry=retry, timeout=limit
+                )
+                if delay is None:
+                    raise
+            else:
+                await self.track_resp(resp)
+                delay = None
+                if policy.should_retry_resp(resp):
+                    delay = policy.get_delay(
+                        method,
+                        attempt,
+                        started,
+                        resp=resp,
+                        retry=retry,
+                        timeout=limit,
+                    )
+            if delay is not None:
+                policy.record(delay)
+                if self.hooks is not None:
+                    self.hooks.on_retry(method, url, attempt, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            if not self.is_session_expired(resp):
+                return self.check_resp(resp)
+
+            # session expired, renew and retry
+            if not await self.renew(generation):
+                raise error.NotAuthenticated()
+            retrying += 1
+            if retrying > self.MAX_RETRIES:
+                req = resp.request
+                raise error.MaxRetries(
+                    f'exceed max retries for {req.method} {req.path_url}, '
+                    f'last resp, {resp.status_code} {resp.content}'
+                )
+
+    async def fetch(self, path, **kwargs):
+        cache = self.response_cache
+        if cache is None:
+            return await self.request('GET', path, **kwargs)
+
+        key = self.request_key(path, kwargs.get('params'))
+        entry = cache.lookup(key)
+        resp = cache.get_fresh(entry)
+        if resp is not None:
+            return resp
+        headers = {
+            **(kwargs.pop('headers', None) or {}),
+            **cache.get_validators(entry),
+        }
+        resp = await self.request('GET', path, headers=headers, **kwargs)
+        return cache.update(key, entry, resp)
+
+    async def get(self, path, **kwargs):
+        if self.single_flight is None:
+            return await self.fetch(path, **kwargs)
+        return await self.single_flight.do_async(
+            self.request_key(path, kwargs.get('params')),
+            lambda: self.fetch(path, **kwargs),
+        )
+
+    async def patch(self, path, data=None, json=None, **kwargs):
+        return await self.request(
+            'PATCH', path, data=data, json=json, **kwargs
+        )
+
+    async def put(self, path, data=None, json=None, **kwargs):
+        return await self.request('PUT', path, data=data, json=json, **kwargs)
+
+    async def post(self, path, data=None, json=None, **kwargs):
+        return await self.request('POST', path, data=data, json=json, **kwargs)
+
+    async def delete(self, path, **kwargs):
+        return await self.request('DELETE', path, **kwargs)
+
+
+class AsyncApiSession(AsyncBaseInterface):
+
+    ROOT_URL = ApiSession.ROOT_URL
+
+    def __init__(self, api_token, **kwargs):
+        super().__init__(**kwargs)
+        self.api_token = api_token
+        self.headers['Accept'] = 'application/json'
+
+    @property
+    def backends(self):
+        backends = super().backends
+        if self.api_token.backend is not None:
+            backends.append(self.api_token.backend)
+        return backends
+
+    async def prepare_headers(self, headers):
+        token = self.api_token.get_cached_token()
+        if token is None:
+            # may wait on the shared backend, e.g. another process renewing
+            token = await self.run_sync(self.api_token.get_token)
+        headers['Authorization'] = f'Bearer {token}'
+        return headers
+
+    async def renew_session(self):
+        # only reached on 401, the token is refreshed ahead of expiring
+        await self.run_sync(self.api_token.renew_token)
+        return True
+
+
+class AsyncPortalSession(AsyncBaseInterface):
+    '''Portal session sending requests on the event loop
+
+    logging in is a rare, multi step and possibly interactive flow(two factor),
+    it is delegated to a blocking PortalSession running in the default
+    executor, cookies are copied over once it is done
+    '''
+
+    DEV_QH65B2 = PortalSession.DEV_QH65B2
+    DEV_V1 = PortalSession.DEV_V1
+    APC_IRIS_V1 = PortalSession.APC_IRIS_V1
+    APC_OLYMPUS_V1 = PortalSession.APC_OLYMPUS_V1
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        two_factor_callback: Callable,
+        backend=None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.portal = PortalSession(
+            username, password, two_factor_callback, backend=backend
+        )
+
+    @property
+    def username(self):
+        return self.portal.username
+
+    @property
+    def backend(self):
+        return self.portal.backend
+
+    @property
+    def backends(self):
+        return [*super().backends, self.backend]
+
+    @property
+    def team_id(self):
+        # cached by portal after the first lookup, which login warms up
+        return self.portal.team_id
+
+    def get_session(self):
+        created = self.session is None or self.session.closed
+        session = super().get_session()
+        if created:
+            self.load_cookies(session)
+        return session
+
+    def load_cookies(self, session=None):
+        jar = (session or self.get_session()).cookie_jar
+        for cookie in self.portal.session.cookies:
+            morsel = Morsel()
+            morsel.set(cookie.name, cookie.value, cookie.value)
+            morsel['path'] = cookie.path or '/'
+            if cookie.domain_specified:
+                morsel['domain'] = cookie.domain
+            jar.update_cookies(
+                {cookie.name: morsel},
+                URL(f'https://{cookie.domain.lstrip(".")}/'),
+            )
+
+    async def login(self):
+        logged_in = await self.run_sync(self.portal.login)
+        if logged_in:
+            await self.run_sync(getattr, self.portal, 'team_id')
+            self.load_cookies()
+        return logged_in
+
+    async def renew_session(self):
+        renewed = await self.run_sync(self.portal.do_login)
+        if renewed:
+            self.load_cookies()
+        return renewed
+
+    async def verify_smscode(self, code, x_id, scnt):
+        await self.run_sync(self.portal.verify_smscode, code, x_id, scnt)
+        self.load_cookies()
@@ -0,0 +1,385 @@
+from base64 import b64decode
+
+from .. import error
+from ..models import ApiKey, Profile
+from ..models import bulk
+from ..models.document import Document
+from ..models.prefetch import AsyncPrefetcher
+from ..models.queryset import Objects, Query, QuerySet, Result
+
+
+class AsyncResult(Result):
+    '''query result helper container, fetches next pages asynchronously
+
+    with prefetch, an iteration left before its end keeps a page fetching
+    task until the iterator is closed, e.g. by contextlib.aclosing
+    '''
+
+    async def rewind(self):
+        if 'first' in self.links:
+            self.objects = []
+            resp = await self.model.client.api_session.get(self.links['first'])
+            self.load_objects(self.decode(resp))
+        return self
+
+    async def fetch_page(self, url):
+        resp = await self.model.client.api_session.get(url)
+        data = self.decode(resp)
+        if isinstance(data, Document):
+            links = data.members['links']
+        else:
+            links = data['links']
+        return data, links.get('next')
+
+    async def iter_fetched(self, url):
+        while url is not None:
+            data, url = await self.fetch_page(url)
+            yield data
+
+    def follow(self, url):
+        if self.prefetch:
+            return AsyncPrefetcher(self.fetch_page, url, self.prefetch)
+        return self.iter_fetched(url)
+
+    async def __aiter__(self):
+        pos = 0
+        pages = None
+        try:
+            while 1:
+                while pos < len(self.objects) or self.load_pending():
+                    yield self.objects[pos]
+                    pos += 1
+
+                if 'next' not in self.links:
+                    return
+                url = self.links['next']
+                if not self.prefetch:
+                    self.load_objects((await self.fetch_page(url))[0])
+                    continue
+                if pages is None or pages.url != url:
+                    if pages is not None:
+                        await pages.aclose()
+                    pages = AsyncPrefetcher(
+                        self.fetch_page, url, self.prefetch
+                    )
+                self.load_objects(await pages.__anext__())
+        finally:
+            if pages is not None:
+                await pages.aclose()
+
+    def __iter__(self):
+        raise TypeError(f'{self} fetches pages asynchronously, use async for')
+
+    def walk(self):
+        raise TypeError(f'{self} fetches pages asynchronously, cannot export')
+
+    async def iter_pages(self):
+        ''' async counterpart of Result.iter_pages '''
+        if self.page is None:
+            while self.load_pending():
+                pass
+        if self.built:
+            yield list(self.built)
+        if self.page is not None:
+            yield self.build_page(self.page)
+        if 'next' not in self.links:
+            return
+        pages = self.follow(self.links['next'])
+        try:
+            async for data in pages:
+                self.track_page()
+                yield self.build_page(data)
+        finally:
+            await pages.aclose()
+
+    async def stream(self):
+        async for page in self.iter_pages():
+            for obj in page:
+                yield obj
+
+
+class AsyncQuerySet(QuerySet):
+    '''QuerySet evaluated asynchronously, by async for, await qs[index],
+    first, exists and count
+    '''
+
+    async def iterator(self):
+        if self.is_empty:
+            return
+        result = await self.model.fetch(self.params)
+        data, url = result.page, result.links.get('next')
+        seen = 0
+        while 1:
+            for obj in self.read_page(result, data):
+                if seen >= self.start:
+                    yield obj
+                seen += 1
+                if seen == self.stop:
+                    return
+            url = self.next_url(url, seen)
+            if url is None:
+                return
+            data, url = await result.fetch_page(url)
+            result.track_page()
+
+    async def __aiter__(self):
+        if self.objects is None:
+            self.objects = [obj async for obj in self.iterator()]
+        for obj in self.objects:
+            yield obj
+
+    def __iter__(self):
+        raise TypeError(f'{self} fetches models asynchronously, use async for')
+
+    def __len__(self):
+        raise TypeError(f'{self} fetches models asynchronously, use count')
+
+    async def at(self, index):
+        if self.objects is not None:
+            return self.objects[index]
+        async for obj in self[index : index + 1].iterator():
+            return obj
+        raise IndexError(index)
+
+    async def first(self):
+        if self.objects is not None:
+            return self.objects[0] if self.objects else None
+        async for obj in self[:1].iterator():
+            return obj
+
+    async def exists(self) -> bool:
+        if self.objects is not None:
+            return bool(self.objects)
+        async for _ in self[:1].iterator():
+            return True
+        return False
+
+    async def count(self) -> int:
+        if self.objects is not None:
+            return len(self.objects)
+        if self.is_empty:
+            return 0
+        result = await self.model.fetch({**self.params, 'limit': 1})
+        total = result.count
+        if self.stop is not None:
+            total = min(total, self.stop)
+        return max(total - self.start, 0)
+
+
+class AsyncModel:
+    ''' awaitable counterparts of the BaseModel network methods '''
+
+    __slots__ = ()
+
+    objects = Objects()
+    QUERY_SET = AsyncQuerySet
+
+    @classmethod
+    async def create(cls, **kwargs):
+        '''Create model instance
+
+        :kwargs: will be passed to build_create_data for validation
+        '''
+        data = cls.build_create_data(**kwargs)
+        session = cls.client.api_session
+        resp = await session.post(f'/{cls.TYPE}', json={'data': data})
+        json_data = session.load_json(resp)
+        cls.invalidate_cached(data, json_data['data'])
+        return cls.from_json(json_data)
+
+    @classmethod
+    async def bulk_create(cls, items, *, workers=None):
+        return await bulk.run_async(
+            lambda kwargs: cls.create(**kwargs),
+            items,
+            workers or cls.BULK_WORKERS,
+        )
+
+    @classmethod
+    async def bulk_update(cls, items, *, workers=None):
+        return await bulk.run_async(
+            lambda pair: pair[0].update(**pair[1]),
+            items,
+            workers or cls.BULK_WORKERS,
+        )
+
+    @classmethod
+    async def bulk_delete(cls, models, *, workers=None):
+        return await bulk.run_async(
+            lambda model: model.delete(), models, workers or cls.BULK_WORKERS
+        )
+
+    @classmethod
+    async def get(cls, pk, *, includes=()):
+        cache = cls.client.model_cache
+        if cache is not None:
+            json_data = cache.get(cls, pk, includes)
+            if json_data is not None:
+                return cls.from_json(json_data)
+        q = Query(includes=includes)
+        params = q.get_params(cls)
+        session = cls.client.api_session
+        resp = await session.get(f'/{cls.TYPE}/{pk}', params=params)
+        json_data = session.load_json(resp)
+        if cache is not None:
+            cache.save(cls, pk, includes, json_data)
+        return cls.from_json(json_data)
+
+    @classmethod
+    async def find(
+        cls,
+        *,
+        filters={},
+        fields={},
+        includes=(),
+        sorts=(),
+        limit=20,
+        related_limits={},
+        incremental=False,
+        prefetch=0,
+    ):
+        q = Query(
+            filters=filters,
+            fields=fields,
+            includes=includes,
+            sorts=sorts,
+            limit=limit,
+            related_limits=related_limits,
+        )
+        return await cls.fetch(q.get_params(cls), incremental, prefetch)
+
+    @classmethod
+    async def fetch(cls, params, incremental=False, prefetch=0):
+        session = cls.client.api_session
+        resp = await session.get(f'/{cls.TYPE}', params=params)
+        if incremental:
+            return AsyncResult(
+                cls, params, Document(resp.text), True, prefetch=prefetch
+            )
+        return AsyncResult(
+            cls, params, session.load_json(resp), prefetch=prefetch
+        )
+
+    @classmethod
+    async def count(cls):
+        return (await cls.find(limit=1)).count
+
+    async def update(self, **kwargs):
+        update_data = self.build_update_data(**kwargs)
+        session = self.client.api_session
+        resp = await session.patch(f'/{self.TYPE}/{self.id}', json=update_data)
+        json_data = session.load_json(resp)
+        self.invalidate_cached(update_data, json_data['data'])
+        return self.reload_from_json(json_data)
+
+    async def delete(self) -> bool:
+        resp = await self.client.api_session.delete(f'/{self.TYPE}/{self.id}')
+        self.invalidate_cached({'type': self.TYPE, 'id': self.id})
+        return resp.ok and resp.status_code == 204
+
+
+class AsyncApiKey(AsyncModel):
+    ''' api keys are managed through the portal(iris) api '''
+
+    __slots__ = ()
+
+    @classmethod
+    async def create(cls, **kwargs):
+        data = cls.build_create_data(**kwargs)
+        portal = cls.client.portal_session
+        resp = await portal.post(
+            f'{portal.APC_IRIS_V1}/{cls.TYPE}', json={'data': data}
+        )
+        return cls.from_json(portal.load_json(resp))
+
+    @classmethod
+    async def get(cls, pk, *, includes=()):
+        q = Query(includes=includes)
+        params = q.get_params(cls)
+        portal = cls.client.portal_session
+        resp = await portal.get(
+            f'{portal.APC_IRIS_V1}/{cls.TYPE}/{pk}', params=params,
+        )
+        return cls.from_json(portal.load_json(resp))
+
+    @classmethod
+    async def find(cls, *, includes=()):
+        q = Query(includes=includes)
+        return await cls.fetch(q.get_params(cls))
+
+    @classmethod
+    async def fetch(cls, params, incremental=False, prefetch=0):
+        portal = cls.client.portal_session
+        resp = await portal.get(
+            f'{portal.APC_IRIS_V1}/{cls.TYPE}', params=params
+        )
+        return AsyncResult(cls, params, portal.load_json(resp))
+
+    async def download_private_key(self):
+        portal = self.client.portal_session
+        resp = await portal.send(
+            'GET',
+            f'{portal.APC_IRIS_V1}/apiKeys/{self.id}',
+            params={'fields[apiKeys]': 'privateKey', 'include': 'provider'},
+        )
+        if resp.ok:
+            data = portal.load_json(resp)
+            self.private_key = b64decode(
+                data['data']['attributes']['privateKey']
+            ).decode()
+            self.provider = data['included'][0]['id']
+            return self.private_key
+        if resp.status_code == 410:
+            raise error.ResourceNotFound(
+                'private key can only be downloaded one time'
+            )
+        raise error.UnwantedResponse(f'{resp}: {resp.text}')
+
+
+class AsyncProfile(AsyncModel):
+    ''' profiles are updated through the developer portal api '''
+
+    __slots__ = ()
+
+    @classmethod
+    async def fetch_csrf_data(cls):
+        portal = cls.client.portal_session
+        resp = await portal.post(
+            f'{portal.DEV_QH65B2}/account/ios/profile/'
+            'listProvisioningProfiles.action',
+            data={
+                'teamId': portal.team_id,
+                'pageNumber': 1,
+                'pageSize': 1,
+                'sort': 'name=asc',
+            },
+            headers={'X-HTTP-Method-Override': 'GET'},
+        )
+        if not ('csrf' in resp.headers and 'csrf_ts' in resp.headers):
+            raise error.NoCsrfData(cls)
+        return {
+            'csrf': resp.headers['csrf'],
+            'csrf_ts': resp.headers['csrf_ts'],
+        }
+
+    async def update(
+        self, name=None, app_id=None, certificates=None, devices=None,
+    ):
+        data = self.build_update_data(name, app_id, certificates, devices)
+        portal = self.client.portal_session
+        resp = await portal.post(
+            f'{portal.DEV_QH65B2}/account/ios/profile'
+            '/regenProvisioningProfile.action',
+            data=data,
+            headers=await self.fetch_csrf_data(),
+        )
+        self.invalidate_cached({'type': self.TYPE, 'id': self.id})
+        return self.from_provisioning_profile(
+            portal.load_json(resp)['provisioningProfile']
+        )
+
+
+mixins = {
+    ApiKey.TYPE: AsyncApiKey,
+    Profile.TYPE: AsyncProfile,
+}
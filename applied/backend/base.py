@@ -1,7 +1,10 @@
+from threading import Lock
+from time import time
 from typing import Any, Union
 
 from cachetools import TTLCache
-import ujson as json
+
+from ..codec import Codec, get_codec
 
 MISSING = object()
 
@@ -9,34 +12,45 @@ MISSING = object()
 class BaseBackend:
 
     TIMEOUT = 30 * 1000
+    # calls do network i/o, async code runs them in an executor
+    BLOCKING = False
 
-    def __init__(self, ttl):
+    def __init__(self, ttl, codec: Codec = None):
         self.ttl = ttl
+        self.codec = get_codec(codec)
         self.values = TTLCache(maxsize=1024, ttl=ttl / 1000)
+        # TTLCache is not thread safe, and the backend is shared by threads
+        self.values_lock = Lock()
+        self.buckets = {}
+        self.buckets_lock = Lock()
 
     def load_data(self, key: str, data):
         try:
-            self.values[key] = json.loads(data)
+            value = self.codec.loads(data)
         except (TypeError, ValueError):
-            self.values[key] = data
+            value = data
+        with self.values_lock:
+            self.values[key] = value
 
     def fetch_value(self, key: str):
         pass
 
     def get(self, key: str) -> Union[bytes, dict]:
-        if key not in self.values:
+        with self.values_lock:
+            found = key in self.values
+        if not found:
             self.fetch_value(key)
-        try:
+        with self.values_lock:
             # still maybe empty
-            return self.values[key]
-        except KeyError:
-            return MISSING
+            return self.values.get(key, MISSING)
 
     def clear(self, key: str):
-        self.values.pop(key, None)
+        with self.values_lock:
+            self.values.pop(key, None)
 
     def save(self, key: str, value: Any, ttl: int = None):
-        self.values[key] = value
+        with self.values_lock:
+            self.values[key] = value
 
     def wait(self, key: str, timeout: int):
         # same as get in BaseBackend
@@ -48,6 +62,34 @@ class BaseBackend:
     def finish_renew(self, key: str, value: str):
         pass
 
+    def get_renewer(self, key: str):
+        ''' value the renew lock of request_renew is held with, or None '''
+        return None
+
+    def take_token(self, key: str, rate: float, capacity: int) -> float:
+        '''Take a token from bucket `key`
+
+        returns 0 if taken, else seconds until a token is available
+        '''
+        with self.buckets_lock:
+            now = time()
+            tokens, ts = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            wait = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self.buckets[key] = (tokens, now)
+            return wait
+
+    def cap_tokens(self, key: str, tokens: int):
+        with self.buckets_lock:
+            now = time()
+            current, ts = self.buckets.get(key, (tokens, now))
+            if current >= tokens:
+                self.buckets[key] = (tokens, now)
+
 
 class TTLCacheBackend(BaseBackend):
 
@@ -2,16 +2,59 @@ from time import time, sleep
 
 from redis import Redis
 
+from ..codec import Codec
 from .base import BaseBackend, MISSING
 
 
+TAKE_TOKEN = '''
+-- TIME before writes needs effects replication before redis 5
+if redis.replicate_commands then redis.replicate_commands() end
+local rate, capacity = tonumber(ARGV[1]), tonumber(ARGV[2])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HMSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+'''
+
+CAP_TOKENS = '''
+-- TIME before writes needs effects replication before redis 5
+if redis.replicate_commands then redis.replicate_commands() end
+local tokens = tonumber(ARGV[1])
+local current = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if current == nil or current >= tokens then
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    redis.call(
+        'HMSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now)
+    )
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+'''
+
+
 class RedisBackend(BaseBackend):
 
     TYPE = 'Redis'
+    BLOCKING = True
+    # seconds between polls in wait
+    WAIT_INTERVAL = 1
 
-    def __init__(self, ttl, rdb: Redis = None):
-        super().__init__(ttl)
+    def __init__(self, ttl, rdb: Redis = None, codec: Codec = None):
+        super().__init__(ttl, codec)
         self.rdb = rdb or Redis()
+        self.take_token_script = self.rdb.register_script(TAKE_TOKEN)
+        self.cap_tokens_script = self.rdb.register_script(CAP_TOKENS)
 
     @property
     def backend_data(self):
@@ -28,19 +71,21 @@ class RedisBackend(BaseBackend):
     def save(self, key: str, value: str, ttl: int = None):
         if ttl is not None and not ttl:
             ttl = self.ttl
-        self.values[key] = value
+        with self.values_lock:
+            self.values[key] = value
         self.rdb.set(key, value, px=ttl)
 
     def wait(self, key: str, timeout: int):
         end = int(time()) * 1000 + timeout
         value = self.rdb.get(key)
         while value is None and int(time()) * 1000 < end:
-            sleep(1)
+            sleep(self.WAIT_INTERVAL)
             value = self.rdb.get(key)
 
         if value is not None:
             self.load_data(key, value)
-            return self.values[key]
+            with self.values_lock:
+                return self.values.get(key, MISSING)
         else:
             return MISSING
 
@@ -48,5 +93,20 @@ class RedisBackend(BaseBackend):
         return self.rdb.set(key, value, px=timeout, nx=True)
 
     def finish_renew(self, key: str, value: str):
-        if self.rdb.get(key) == value:
+        current = self.rdb.get(key)
+        # bytes unless the client decodes responses
+        if isinstance(current, bytes):
+            current = current.decode()
+        if current == value:
             self.rdb.delete(key)
+
+    def get_renewer(self, key: str):
+        value = self.rdb.get(key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def take_token(self, key: str, rate: float, capacity: int) -> float:
+        # buckets are shared by every process using the same redis
+        return float(self.take_token_script(keys=[key], args=[rate, capacity]))
+
+    def cap_tokens(self, key: str, tokens: int):
+        self.cap_tokens_script(keys=[key], args=[tokens, self.ttl])
@@ -1,8 +1,6 @@
 from functools import wraps
 from uuid import uuid4
 
-from ujson import dumps
-
 from . import MISSING
 
 
@@ -18,7 +16,7 @@ def cache(key_format, default=None, ttl=None):
                 identity = str(uuid4())
                 if backend.request_renew(key, identity, backend.TIMEOUT):
                     value = func(self, *args, **kwargs)
-                    backend.save(key, dumps(value), ttl)
+                    backend.save(key, backend.codec.dumps(value), ttl)
                     backend.finish_renew(key, identity)
                 else:
                     # someone else doing renew, wait for it
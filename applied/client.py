@@ -1,18 +1,55 @@
+from weakref import WeakValueDictionary
+
+from .codec import Codec, get_codec
 from .error import DuplicatedModel
 from .interface import PortalSession, ApiSession
 from .models import models
-from .models.base import delegate
+from .models.base import compact, delegate
+from .models.cache import ModelCache
+from .models.lazy import LazyAttributes, LazyModel
 
 
 class Client:
+    '''Entry of applied, models delegated to the client use its sessions
+
+    a client can be shared by any number of threads, its sessions pool
+    connections per host(see BaseInterface for the pool options) and renew
+    expired sessions once for all threads waiting on them
+
+    :identity_map: share models across documents, a resource which is still
+                   referenced is updated in place instead of built again
+    :compact: delegate compact copies of the models, which keep their fields
+              in __slots__, for holding large inventories, see compact
+    :lazy_relationships: resolve relationships when first read, fetching
+                         the ones not included, see LazyModel
+    :lazy_attributes: decode attributes when first read, see LazyAttributes
+    :model_cache: ModelCache serving get from stored documents, see
+                  models/cache.py, None to always fetch
+    '''
+
     def __init__(
         self,
         portal_session: PortalSession = None,
         api_session: ApiSession = None,
+        codec: Codec = None,
+        identity_map: bool = False,
+        compact: bool = False,
+        lazy_relationships: bool = False,
+        lazy_attributes: bool = False,
+        model_cache: ModelCache = None,
     ):
         self.portal_session = portal_session
         self.api_session = api_session
         self.MODEL_CLASSES = {}
+        # models by (type, id), dropped once nothing else references them
+        self.identity_map = WeakValueDictionary() if identity_map else None
+        self.compact = compact
+        self.lazy_relationships = lazy_relationships
+        self.lazy_attributes = lazy_attributes
+        self.model_cache = model_cache
+
+        if codec is not None:
+            self.use_codec(codec)
 
         for model in models.values():
             self.delegate(model)
@@ -20,6 +57,24 @@ class Client:
     def delegate(self, model):
         if model.TYPE in self.MODEL_CLASSES:
             raise DuplicatedModel(model.TYPE)
-        delegated = delegate(model, self)
+        mixins = self.get_model_mixins(model)
+        if self.lazy_relationships:
+            mixins = (*mixins, LazyModel)
+        if self.lazy_attributes:
+            mixins = (*mixins, LazyAttributes)
+        if self.compact:
+            model = compact(model)
+        delegated = delegate(model, self, *mixins)
         setattr(self, model.__name__, delegated)
         self.MODEL_CLASSES[model.TYPE] = delegated
+
+    def use_codec(self, codec: Codec):
+        ''' json codec of the sessions and the backends they use '''
+        for session in (self.portal_session, self.api_session):
+            if session is not None:
+                session.use_codec(codec)
+        if self.model_cache is not None:
+            self.model_cache.backend.codec = get_codec(codec)
+
+    def get_model_mixins(self, model):
+        return ()
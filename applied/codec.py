@@ -0,0 +1,73 @@
+'''JSON codecs shared by the interfaces, models and backends
+
+`orjson` and `ujson` are used when installed, stdlib json otherwise:
+    get_codec()           # fastest available
+    get_codec('ujson')    # by name, raises UnknownCodec if not installed
+'''
+import json
+
+from .error import UnknownCodec
+
+
+class Codec:
+
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'))
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def __repr__(self):
+        return f'<Codec {self.name}>'
+
+
+class UJsonCodec(Codec):
+
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+
+        self.dumps = ujson.dumps
+        self.loads = ujson.loads
+
+
+class OrJsonCodec(Codec):
+    ''' dumps returns bytes, which requests and the backends accept '''
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+
+        self.dumps = orjson.dumps
+        self.loads = orjson.loads
+
+
+codecs = {
+    OrJsonCodec.name: OrJsonCodec,
+    UJsonCodec.name: UJsonCodec,
+    Codec.name: Codec,
+}
+instances = {}
+
+
+def get_codec(codec=None) -> Codec:
+    if isinstance(codec, Codec):
+        return codec
+    if codec is not None:
+        if codec not in codecs:
+            raise UnknownCodec(codec, list(codecs))
+        try:
+            return instances.setdefault(codec, codecs[codec]())
+        except ImportError:
+            raise UnknownCodec(f'{codec} is not installed')
+
+    # fastest available
+    for name in codecs:
+        try:
+            return get_codec(name)
+        except UnknownCodec:
+            continue
@@ -0,0 +1,16 @@
+'''Offline stand-in for the app store connect api, for load and latency tests
+
+    with Emulator(Store(devices=10000, profiles=1000)) as emulator:
+        session = ApiSession(api_token)
+        session.ROOT_URL = emulator.url
+
+or from a shell, serving until interrupted:
+    python -m applied.emulator --port 8000 --latency 0.05 devices=10000
+'''
+__all__ = (
+    'Emulator',
+    'Store',
+)
+
+from .server import Emulator
+from .store import Store
@@ -0,0 +1,50 @@
+import argparse
+
+from .server import Emulator
+from .store import Store
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m applied.emulator',
+        description='serve an offline app store connect api',
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--latency', type=float, default=0, help='seconds per response'
+    )
+    parser.add_argument(
+        '--token-lifetime', type=float, help='seconds a token is accepted'
+    )
+    parser.add_argument('--rate-limit', type=int, help='requests per hour')
+    parser.add_argument(
+        'counts',
+        nargs='*',
+        metavar='TYPE=COUNT',
+        help='resources to generate, e.g. devices=10000',
+    )
+    args = parser.parse_args()
+
+    counts = {}
+    for item in args.counts:
+        name, _, number = item.partition('=')
+        counts[name] = int(number)
+    emulator = Emulator(
+        Store(seed=args.seed, **counts),
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        token_lifetime=args.token_lifetime,
+        rate_limit=args.rate_limit,
+    ).start()
+    print(f'serving {emulator.url}')
+    try:
+        emulator.thread.join()
+    except KeyboardInterrupt:
+        emulator.stop()
+
+
+if __name__ == '__main__':
+    main()
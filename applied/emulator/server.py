@@ -0,0 +1,411 @@
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import monotonic, sleep
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from ..codec import get_codec
+from .store import Store
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    # keep-alive, like the real api
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self):
+        emulator = self.server.emulator
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, headers, content = emulator.handle(
+            self.command, self.path, self.headers, body
+        )
+        delay = emulator.get_latency(self.command, self.path)
+        if delay > 0:
+            sleep(delay)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = reply
+
+
+class Emulator:
+    '''Local stand-in for the app store connect api
+
+    serves the resources of a Store on a background thread, with `links.next`
+    pagination, `include`, `fields`, `filter`, `sort` and `limit` handled
+    the way the api does, e.g.:
+        with Emulator(Store(devices=10000), latency=0.05) as emulator:
+            session = ApiSession(api_token)
+            session.ROOT_URL = emulator.url
+            client = Client(api_session=session)
+            for device in client.Device.find(limit=200):
+                ...
+
+    any bearer token is accepted, the token is not verified
+
+    :store: resources served, a default Store if None
+    :latency: seconds each response is delayed, or a callable(method, path)
+              returning them
+    :token_lifetime: seconds a bearer token is accepted after its first
+                     request, it is answered with 401 after that
+    :rate_limit: requests allowed per hour, reported in X-Rate-Limit and
+                 answered with 429 once used up
+    '''
+
+    PREFIX = '/v1'
+    RATE_LIMIT_PERIOD = 3600
+
+    def __init__(
+        self,
+        store: Store = None,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency=0,
+        token_lifetime: float = None,
+        rate_limit: int = None,
+    ):
+        self.store = store or Store()
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.token_lifetime = token_lifetime
+        self.rate_limit = rate_limit
+        self.codec = get_codec()
+
+        self.server = None
+        self.thread = None
+        self.lock = Lock()
+        self.tokens = {}
+        self.window_started = monotonic()
+        self.used = 0
+        self.statuses = Counter()
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}{self.PREFIX}'
+
+    @property
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': sum(self.statuses.values()),
+                'statuses': dict(self.statuses),
+            }
+
+    def start(self):
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.server.emulator = self
+        self.port = self.server.server_address[1]
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def expire_tokens(self):
+        ''' answer the tokens seen so far with 401 from now on '''
+        with self.lock:
+            for token in self.tokens:
+                self.tokens[token] = float('-inf')
+
+    def get_latency(self, method, path):
+        if callable(self.latency):
+            return self.latency(method, path)
+        return self.latency
+
+    def is_token_expired(self, token):
+        with self.lock:
+            first_seen = self.tokens.setdefault(token, monotonic())
+        if first_seen == float('-inf'):
+            return True
+        if self.token_lifetime is None:
+            return False
+        return monotonic() - first_seen > self.token_lifetime
+
+    def take_quota(self):
+        ''' remaining requests of the hour, None if used up '''
+        with self.lock:
+            now = monotonic()
+            if now - self.window_started >= self.RATE_LIMIT_PERIOD:
+                self.window_started, self.used = now, 0
+            if self.used >= self.rate_limit:
+                return None
+            self.used += 1
+            return self.rate_limit - self.used
+
+    def handle(self, method, path, headers, body):
+        ''' status, headers and content answering the request '''
+        resp_headers = {'Content-Type': 'application/json'}
+        remaining = None
+        if self.rate_limit is not None:
+            remaining = self.take_quota()
+            resp_headers['X-Rate-Limit'] = (
+                f'user-hour-lim:{self.rate_limit};'
+                f'user-hour-rem:{remaining or 0};'
+            )
+        if self.rate_limit is not None and remaining is None:
+            status, payload = self.error(
+                429,
+                'RATE_LIMIT_EXCEEDED',
+                'The request rate limit has been reached.',
+            )
+        else:
+            status, payload = self.dispatch(method, path, headers, body)
+        with self.lock:
+            self.statuses[status] += 1
+        if payload is None:
+            return status, resp_headers, b''
+        content = self.codec.dumps(payload)
+        if isinstance(content, str):
+            content = content.encode()
+        return status, resp_headers, content
+
+    @staticmethod
+    def error(status, code, detail):
+        title = code.split('.')[0].replace('_', ' ').capitalize()
+        error = {
+            'status': str(status),
+            'code': code,
+            'title': title,
+            'detail': detail,
+        }
+        return status, {'errors': [error]}
+
+    def dispatch(self, method, path, headers, body):
+        authorization = headers.get('Authorization') or ''
+        if not authorization.startswith('Bearer '):
+            return self.error(
+                401,
+                'NOT_AUTHORIZED',
+                'Provide a properly configured and signed bearer token.',
+            )
+        if self.is_token_expired(authorization[7:]):
+            return self.error(
+                401, 'NOT_AUTHORIZED', 'The bearer token has expired.'
+            )
+
+        parts = urlsplit(path)
+        if not parts.path.startswith(f'{self.PREFIX}/'):
+            return self.error(404, 'NOT_FOUND', f'{parts.path} not found')
+        segments = parts.path[len(self.PREFIX) + 1 :].strip('/').split('/')
+        if segments[0] not in self.store.RELATIONSHIPS:
+            return self.error(404, 'NOT_FOUND', f'{segments[0]} not found')
+        params = dict(parse_qsl(parts.query, keep_blank_values=True))
+        try:
+            data = self.codec.loads(body) if body else {}
+        except ValueError:
+            return self.error(400, 'ENTITY_UNPARSABLE', 'invalid json body')
+        # some models send the resource object without the data member
+        data = data.get('data', data)
+        try:
+            return self.route(method, path, segments, params, data)
+        except ValueError as e:
+            return self.error(400, 'PARAMETER_ERROR.INVALID', str(e))
+
+    def route(self, method, path, segments, params, data):
+        type_ = segments[0]
+        if len(segments) == 1:
+            if method == 'GET':
+                return self.collection(type_, params)
+            if method == 'POST':
+                resource = self.store.create(type_, data)
+                return 201, self.document(resource, params)
+        elif len(segments) == 2:
+            rid = segments[1]
+            if self.store.get(type_, rid) is None:
+                return self.error(404, 'NOT_FOUND', f'{type_}/{rid}')
+            if method == 'GET':
+                return 200, self.document(self.store.get(type_, rid), params)
+            if method == 'PATCH':
+                resource = self.store.update(type_, rid, data)
+                return 200, self.document(resource, params)
+            if method == 'DELETE':
+                self.store.delete(type_, rid)
+                return 204, None
+        elif method == 'GET':
+            return self.related(type_, segments[1:], params)
+        return self.error(405, 'METHOD_NOT_ALLOWED', f'{method} {path}')
+
+    def parse_params(self, type_, params):
+        '''Split query params, raises ValueError on invalid ones'''
+        filters, fields, limits = {}, {}, {}
+        for name, value in params.items():
+            if name.startswith('filter['):
+                filters[name[7:-1]] = set(value.split(','))
+            elif name.startswith('fields['):
+                fields[name[7:-1]] = set(value.split(','))
+            elif name.startswith('limit['):
+                limits[name[6:-1]] = int(value)
+        includes = {
+            name for name in params.get('include', '').split(',') if name
+        }
+        unknown = includes - self.store.RELATIONSHIPS[type_].keys()
+        if unknown:
+            raise ValueError(f'unknown include {",".join(unknown)}')
+        sorts = [name for name in params.get('sort', '').split(',') if name]
+        limit = int(params.get('limit', self.store.LIMIT))
+        if not 0 < limit <= self.store.MAX_LIMIT:
+            raise ValueError(f'limit must be in 1...{self.store.MAX_LIMIT}')
+        return filters, fields, includes, limits, sorts, limit
+
+    def collection(self, type_, params):
+        filters, fields, includes, limits, sorts, limit = self.parse_params(
+            type_, params
+        )
+        offset = int(params.get('cursor', 0))
+        resources = self.store.find(type_, filters, sorts)
+        page = resources[offset : offset + limit]
+        links = {'self': f'{self.url}/{type_}?{urlencode(params)}'}
+        if offset + limit < len(resources):
+            next_params = {**params, 'cursor': offset + limit}
+            links['next'] = f'{self.url}/{type_}?{urlencode(next_params)}'
+        doc = {
+            'data': [
+                self.render(resource, fields, includes, limits)
+                for resource in page
+            ],
+            'links': links,
+            'meta': {'paging': {'total': len(resources), 'limit': limit}},
+        }
+        if includes:
+            doc['included'] = self.render_included(
+                page, fields, includes, limits
+            )
+        return 200, doc
+
+    def related(self, type_, segments, params):
+        ''' /{type}/{id}/{name} and /{type}/{id}/relationships/{name} '''
+        rid, name = segments[0], segments[-1]
+        resource = self.store.get(type_, rid)
+        if resource is None or name not in resource['relationships']:
+            return self.error(404, 'NOT_FOUND', '/'.join((type_, *segments)))
+        related = self.store.related(resource, name)
+        if len(segments) == 3 and segments[1] == 'relationships':
+            data = resource['relationships'][name]['data']
+            return 200, {'data': data}
+        related_type = self.store.RELATIONSHIPS[type_][name]
+        url = f'{self.url}/{type_}/{rid}/{name}'
+        if (type_, name) in self.store.TO_ONE:
+            _, fields, _, _, _, _ = self.parse_params(related_type, params)
+            return (
+                200,
+                {
+                    'data': (
+                        self.render(related[0], fields, set(), {})
+                        if related
+                        else None
+                    ),
+                    'links': {'self': url},
+                },
+            )
+        _, fields, _, _, _, limit = self.parse_params(related_type, params)
+        offset = int(params.get('cursor', 0))
+        links = {'self': url}
+        if offset + limit < len(related):
+            next_params = {**params, 'cursor': offset + limit}
+            links['next'] = f'{url}?{urlencode(next_params)}'
+        return (
+            200,
+            {
+                'data': [
+                    self.render(ele, fields, set(), {})
+                    for ele in related[offset : offset + limit]
+                ],
+                'links': links,
+                'meta': {'paging': {'total': len(related), 'limit': limit}},
+            },
+        )
+
+    def document(self, resource, params):
+        _, fields, includes, limits, _, _ = self.parse_params(
+            resource['type'], {**params, 'limit': 1}
+        )
+        doc = {
+            'data': self.render(resource, fields, includes, limits),
+            'links': {
+                'self': f'{self.url}/{resource["type"]}/{resource["id"]}'
+            },
+        }
+        if includes:
+            doc['included'] = self.render_included(
+                [resource], fields, includes, limits
+            )
+        return doc
+
+    def render(self, resource, fields, includes, limits):
+        ''' resource object as the api shows it '''
+        type_, rid = resource['type'], resource['id']
+        url = f'{self.url}/{type_}/{rid}'
+        wanted = fields.get(type_)
+        attributes = resource['attributes']
+        if wanted is not None:
+            attributes = {
+                name: value
+                for name, value in attributes.items()
+                if name in wanted
+            }
+        relationships = {}
+        for name, relationship in resource['relationships'].items():
+            if wanted is not None and name not in wanted:
+                continue
+            value = {
+                'links': {
+                    'self': f'{url}/relationships/{name}',
+                    'related': f'{url}/{name}',
+                }
+            }
+            # linkage is only shown for included relationships
+            if name in includes:
+                data = relationship['data']
+                if isinstance(data, list):
+                    value['meta'] = {
+                        'paging': {
+                            'total': len(data),
+                            'limit': limits.get(name, len(data)),
+                        }
+                    }
+                    data = data[: limits.get(name, len(data))]
+                value['data'] = data
+            relationships[name] = value
+        rendered = {
+            'type': type_,
+            'id': rid,
+            'attributes': attributes,
+            'links': {'self': url},
+        }
+        if relationships:
+            rendered['relationships'] = relationships
+        return rendered
+
+    def render_included(self, resources, fields, includes, limits):
+        included, seen = [], set()
+        for resource in resources:
+            for name in includes:
+                related = self.store.related(resource, name)
+                if name in limits:
+                    related = related[: limits[name]]
+                for ele in related:
+                    key = (ele['type'], ele['id'])
+                    if key not in seen:
+                        seen.add(key)
+                        included.append(self.render(ele, fields, set(), {}))
+        return included
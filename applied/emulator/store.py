@@ -0,0 +1,270 @@
+from base64 import b64encode
+from collections import defaultdict
+from itertools import count
+from random import Random
+from threading import Lock
+
+
+def blob(random: Random, size: int) -> str:
+    data = random.getrandbits(8 * size).to_bytes(size, 'big')
+    return b64encode(data).decode()
+
+
+class Store:
+    '''In memory app store connect resources, generated from a seed
+
+    resources are kept as JSON:API resource objects, relationships hold the
+    linkage of every related resource, what a response shows of them depends
+    on the `include` and `fields` of the request
+
+    :seed: same seed, same resources
+    :content_size: bytes of the generated profile and certificate contents
+    :profile_devices: devices of each profile
+    :profile_certificates: certificates of each profile
+    :counts: resources to generate per type, e.g. devices=10000
+    '''
+
+    MAX_LIMIT = 200
+    LIMIT = 20
+
+    COUNTS = {
+        'users': 10,
+        'apps': 10,
+        'devices': 100,
+        'certificates': 10,
+        'bundleIds': 20,
+        'profiles': 50,
+    }
+    CAPABILITIES = ('PUSH_NOTIFICATIONS', 'ICLOUD', 'GAME_CENTER', 'MAPS')
+
+    # relationship name to the type it points to, per resource type
+    RELATIONSHIPS = {
+        'users': {'visibleApps': 'apps'},
+        'apps': {},
+        'devices': {},
+        'certificates': {},
+        'bundleIds': {
+            'bundleIdCapabilities': 'bundleIdCapabilities',
+            'profiles': 'profiles',
+        },
+        'bundleIdCapabilities': {},
+        'profiles': {
+            'bundleId': 'bundleIds',
+            'certificates': 'certificates',
+            'devices': 'devices',
+        },
+    }
+    TO_ONE = {('profiles', 'bundleId')}
+
+    def __init__(
+        self,
+        seed: int = 0,
+        content_size: int = 2048,
+        profile_devices: int = 20,
+        profile_certificates: int = 3,
+        **counts,
+    ):
+        self.random = Random(seed)
+        self.content_size = content_size
+        self.resources = defaultdict(dict)
+        self.ids = count(1)
+        self.lock = Lock()
+
+        counts = {**self.COUNTS, **counts}
+        for type_ in ('apps', 'users', 'devices', 'certificates'):
+            for _ in range(counts[type_]):
+                self.add(self.build(type_))
+        apps = list(self.resources['apps'].values())
+        for user in self.resources['users'].values():
+            for app in self.sample(apps, 3):
+                self.link(user, 'visibleApps', app)
+        for _ in range(counts['bundleIds']):
+            bundle_id = self.add(self.build('bundleIds'))
+            for capability_type in self.CAPABILITIES:
+                capability = self.build('bundleIdCapabilities')
+                capability['attributes']['capabilityType'] = capability_type
+                self.add(capability)
+                self.link(bundle_id, 'bundleIdCapabilities', capability)
+        devices = list(self.resources['devices'].values())
+        certificates = list(self.resources['certificates'].values())
+        bundle_ids = list(self.resources['bundleIds'].values())
+        for _ in range(counts['profiles']):
+            profile = self.add(self.build('profiles'))
+            if bundle_ids:
+                bundle_id = self.random.choice(bundle_ids)
+                self.link(profile, 'bundleId', bundle_id)
+                self.link(bundle_id, 'profiles', profile)
+            for device in self.sample(devices, profile_devices):
+                self.link(profile, 'devices', device)
+            for cert in self.sample(certificates, profile_certificates):
+                self.link(profile, 'certificates', cert)
+
+    def sample(self, population, size):
+        return self.random.sample(population, min(size, len(population)))
+
+    def next_id(self, type_):
+        return f'{type_[0].upper()}{next(self.ids):09d}'
+
+    def build(self, type_):
+        ''' new resource of type_ with generated attributes '''
+        random = self.random
+        rid = self.next_id(type_)
+        if type_ == 'users':
+            attributes = {
+                'firstName': f'first {rid}',
+                'lastName': f'last {rid}',
+                'username': f'{rid.lower()}@example.com',
+                'roles': [random.choice(('ADMIN', 'DEVELOPER', 'SALES'))],
+                'provisioningAllowed': random.random() < 0.5,
+                'allAppsVisible': random.random() < 0.5,
+            }
+        elif type_ == 'apps':
+            attributes = {
+                'bundleId': f'com.example.{rid.lower()}',
+                'name': f'app {rid}',
+                'sku': rid,
+                'primaryLocale': 'en-US',
+                'removed': False,
+                'isAAG': False,
+            }
+        elif type_ == 'devices':
+            attributes = {
+                'udid': f'{random.getrandbits(160):040x}',
+                'name': f'device {rid}',
+                'deviceClass': random.choice(('IPHONE', 'IPAD', 'MAC')),
+                'model': random.choice(('iPhone 11', 'iPad Pro', 'iMac')),
+                'platform': random.choice(('IOS', 'MAC_OS')),
+                'addedDate': '2019-10-01T08:00:00.000+0000',
+                'status': random.choice(('ENABLED', 'DISABLED')),
+            }
+        elif type_ == 'certificates':
+            attributes = {
+                'serialNumber': f'{random.getrandbits(64):016X}',
+                'name': f'iOS Distribution: {rid}',
+                'displayName': rid,
+                'platform': 'IOS',
+                'expirationDate': '2020-10-01T08:00:00.000+0000',
+                'certificateType': random.choice(
+                    ('IOS_DEVELOPMENT', 'IOS_DISTRIBUTION')
+                ),
+                'certificateContent': blob(random, self.content_size),
+            }
+        elif type_ == 'bundleIds':
+            attributes = {
+                'identifier': f'com.example.{rid.lower()}',
+                'name': f'bundle {rid}',
+                'platform': random.choice(('IOS', 'MAC_OS')),
+                'seedId': 'ABCDE12345',
+            }
+        elif type_ == 'bundleIdCapabilities':
+            attributes = {
+                'capabilityType': random.choice(self.CAPABILITIES),
+                'settings': [],
+            }
+        elif type_ == 'profiles':
+            attributes = {
+                'uuid': f'{random.getrandbits(128):032x}',
+                'name': f'profile {rid}',
+                'platform': 'IOS',
+                'profileType': random.choice(
+                    ('IOS_APP_DEVELOPMENT', 'IOS_APP_ADHOC', 'IOS_APP_STORE')
+                ),
+                'profileContent': blob(random, self.content_size),
+                'profileState': 'ACTIVE',
+                'createdDate': '2019-10-01T08:00:00.000+0000',
+                'expirationDate': '2020-10-01T08:00:00.000+0000',
+            }
+        else:
+            raise KeyError(type_)
+        return {
+            'type': type_,
+            'id': rid,
+            'attributes': attributes,
+            'relationships': {
+                name: {'data': None if (type_, name) in self.TO_ONE else []}
+                for name in self.RELATIONSHIPS[type_]
+            },
+        }
+
+    def add(self, resource):
+        self.resources[resource['type']][resource['id']] = resource
+        return resource
+
+    def link(self, resource, name, related):
+        linkage = {'type': related['type'], 'id': related['id']}
+        relationship = resource['relationships'][name]
+        if isinstance(relationship['data'], list):
+            relationship['data'].append(linkage)
+        else:
+            relationship['data'] = linkage
+
+    def get(self, type_, rid):
+        return self.resources[type_].get(rid)
+
+    def related(self, resource, name):
+        data = resource['relationships'][name]['data']
+        if data is None:
+            return []
+        if isinstance(data, dict):
+            data = [data]
+        return [
+            related
+            for related in (self.get(ele['type'], ele['id']) for ele in data)
+            if related is not None
+        ]
+
+    @staticmethod
+    def matches(resource, name, values):
+        if name == 'id':
+            return resource['id'] in values
+        value = resource['attributes'].get(name)
+        if isinstance(value, list):
+            return any(str(ele) in values for ele in value)
+        if isinstance(value, bool):
+            value = str(value).lower()
+        return str(value) in values
+
+    def find(self, type_, filters=None, sorts=()):
+        '''Resources of type_ matching all filters, in sorts order
+
+        :filters: attribute name to accepted values
+        :sorts: attribute names, `-` prefixed for descending order
+        '''
+        resources = list(self.resources[type_].values())
+        for name, values in (filters or {}).items():
+            resources = [
+                resource
+                for resource in resources
+                if self.matches(resource, name, values)
+            ]
+        # sort by the last key first, python's sort is stable
+        for key in reversed(sorts):
+            name = key.lstrip('-')
+            resources.sort(
+                key=lambda resource: (
+                    resource['id']
+                    if name == 'id'
+                    else str(resource['attributes'].get(name, ''))
+                ),
+                reverse=key.startswith('-'),
+            )
+        return resources
+
+    def create(self, type_, data):
+        resource = self.build(type_)
+        resource['attributes'].update(data.get('attributes', {}))
+        for name, value in data.get('relationships', {}).items():
+            if name in resource['relationships']:
+                resource['relationships'][name] = {'data': value.get('data')}
+        with self.lock:
+            return self.add(resource)
+
+    def update(self, type_, rid, data):
+        resource = self.get(type_, rid)
+        if resource is not None:
+            resource['attributes'].update(data.get('attributes', {}))
+        return resource
+
+    def delete(self, type_, rid):
+        with self.lock:
+            return self.resources[type_].pop(rid, None) is not None
@@ -42,10 +42,22 @@ class UnknownAuthOption(AppliedError):
     ''' cannot handle auth option '''
 
 
+class RateLimitExceeded(AppliedError):
+    ''' hourly request quota of the api key is used up(429) '''
+
+
 class UnwantedResponse(AppliedError):
     ''' cannot handle auth option '''
 
 
+class UnknownCodec(AppliedError):
+    ''' json codec not supported or not installed '''
+
+
+class MissingDependency(AppliedError):
+    ''' optional package not installed '''
+
+
 class UnknownModelData(AppliedError):
     ''' cannot handle model data '''
 
@@ -92,3 +104,7 @@ class NoResultFound(AppliedError):
 
 class MultipleResultsFound(AppliedError):
     ''' multiple results found '''
+
+
+class BulkFailed(AppliedError):
+    ''' some items of a bulk operation failed '''
@@ -1,4 +1,19 @@
-__all__ = ('ApiToken', 'ApiSession', 'PortalSession')
+__all__ = (
+    'ApiToken',
+    'ApiSession',
+    'Hooks',
+    'Metrics',
+    'PortalSession',
+    'RateLimiter',
+    'ResponseCache',
+    'RetryPolicy',
+    'SingleFlight',
+)
 
 from .appstoreconnect import ApiToken, ApiSession
+from .cache import ResponseCache
+from .coalesce import SingleFlight
+from .metrics import Hooks, Metrics
 from .portal import PortalSession
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
@@ -1,27 +1,69 @@
+from threading import Lock
 from time import time
+from uuid import uuid4
 
 import jwt
 
+from applied import logger
 from applied.error import InvalidJWT
 
+from ..backend import MISSING, BaseBackend
 from .base import BaseInterface
 
 
 class ApiToken:
-    def __init__(self, key_id: str, auth_key: str, issuer_id: str):
+    '''Signs and caches the jwt used by ApiSession
+
+    the signed token is reused until it is within refresh_margin seconds of
+    expiring, when a backend is given the token is shared through it so all
+    processes using the same key sign once per lifetime
+
+    :lifetime: seconds a token is valid, apple rejects more than 20 mins
+    :refresh_margin: seconds before expiring a new token is signed
+    '''
+
+    LIFETIME = 1200  # 20 mins
+    REFRESH_MARGIN = 60
+
+    def __init__(
+        self,
+        key_id: str,
+        auth_key: str,
+        issuer_id: str,
+        backend: BaseBackend = None,
+        lifetime: int = None,
+        refresh_margin: int = None,
+    ):
         self.key_id = key_id
         self.auth_key = auth_key
         self.issuer_id = issuer_id
+        self.backend = backend
+        self.lifetime = lifetime or self.LIFETIME
+        self.refresh_margin = (
+            self.REFRESH_MARGIN if refresh_margin is None else refresh_margin
+        )
 
-    def renew_token(self):
+        self.token = None
+        self.expires_at = 0
+        self.lock = Lock()
+
+    @property
+    def backend_key(self):
+        return f'{self.issuer_id}_{self.key_id}.token'
+
+    def is_fresh(self, expires_at):
+        return time() < expires_at - self.refresh_margin
+
+    def sign(self):
+        expires_at = int(time()) + self.lifetime
         jwt_header = {'alg': 'ES256', 'kid': self.key_id, 'typ': 'JWT'}
         jwt_payload = {
             'iss': self.issuer_id,
-            'exp': int(time()) + 1200,  # 20 mins
+            'exp': expires_at,
             'aud': f'appstoreconnect-v1',
         }
         try:
-            return jwt.encode(
+            token = jwt.encode(
                 jwt_payload,
                 self.auth_key,
                 algorithm='ES256',
@@ -31,25 +73,99 @@ class ApiToken:
             raise InvalidJWT(
                 f'invalid key: {self.key_id}, issuer_id: {self.issuer_id}'
             )
+        return token, expires_at
+
+    def get_cached_token(self):
+        ''' cached token if it is fresh, else None, never blocks '''
+        if self.is_fresh(self.expires_at):
+            return self.token
+
+    def get_token(self):
+        ''' cached token, renewed when it is about to expire '''
+        if self.is_fresh(self.expires_at):
+            return self.token
+        with self.lock:
+            if not self.is_fresh(self.expires_at):
+                if not self.load_shared_token():
+                    self.renew_token()
+            return self.token
+
+    def renew_token(self):
+        ''' sign a new token and share it, even if the cached one is fresh '''
+        backend = self.backend
+        if backend is None:
+            self.token, self.expires_at = self.sign()
+            return self.token
+
+        lock_name = f'renew_{self.backend_key}'
+        identity = str(uuid4())
+        if backend.request_renew(lock_name, identity, backend.TIMEOUT):
+            try:
+                self.token, self.expires_at = self.sign()
+                # expire the shared copy when it needs refreshing, so
+                # waiters below never pick up a stale one
+                ttl = (self.expires_at - self.refresh_margin - time()) * 1000
+                value = {'token': self.token, 'expires_at': self.expires_at}
+                backend.save(
+                    self.backend_key,
+                    backend.codec.dumps(value),
+                    ttl=max(int(ttl), 1),
+                )
+            finally:
+                backend.finish_renew(lock_name, identity)
+        else:
+            # someone else is signing, wait for it
+            logger.debug(f'wait token renew, {self.backend_key}')
+            backend.clear(self.backend_key)
+            backend.wait(self.backend_key, backend.TIMEOUT)
+            if not self.load_shared_token():
+                self.token, self.expires_at = self.sign()
+        return self.token
+
+    def load_shared_token(self):
+        if self.backend is None:
+            return False
+        value = self.backend.get(self.backend_key)
+        if value is MISSING:
+            return False
+        if isinstance(value, (str, bytes)):
+            value = self.backend.codec.loads(value)
+        if not self.is_fresh(value['expires_at']):
+            # only this process still caches it
+            self.backend.clear(self.backend_key)
+            return False
+        self.token, self.expires_at = value['token'], value['expires_at']
+        return True
 
 
 class ApiSession(BaseInterface):
 
     ROOT_URL = 'https://api.appstoreconnect.apple.com/v1'
 
-    def __init__(self, api_token):
-        super().__init__()
+    def __init__(self, api_token, **kwargs):
+        super().__init__(**kwargs)
         self.api_token = api_token
         self.session.headers['Accept'] = 'application/json'
 
-        self.renew_session()
+    @property
+    def backends(self):
+        backends = super().backends
+        if self.api_token.backend is not None:
+            backends.append(self.api_token.backend)
+        return backends
+
+    @property
+    def authorization(self):
+        return f'Bearer {self.api_token.get_token()}'
 
     def renew_session(self):
-        self.session.headers[
-            'Authorization'
-        ] = f'Bearer {self.api_token.renew_token()}'
+        # only reached on 401, the token is refreshed ahead of expiring
+        self.api_token.renew_token()
         return True
 
+    def prepare_headers(self, headers):
+        return {**(headers or {}), 'Authorization': self.authorization}
+
     def renew_req(self, req):
-        req.headers['Authorization'] = self.session.headers['Authorization']
+        req.headers['Authorization'] = self.authorization
         return req
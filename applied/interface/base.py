@@ -1,44 +1,207 @@
+from threading import Lock
+from time import monotonic, perf_counter, sleep
+from urllib.parse import urlencode
+
 import requests
+from requests.adapters import HTTPAdapter
 
-from .. import error
+from .. import error, logger
+from ..codec import Codec, get_codec
+from .cache import ResponseCache
+from .coalesce import SingleFlight
+from .metrics import Hooks
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
 
 
 class BaseInterface:
+    '''Base of the http interfaces
+
+    an interface is safe to share across threads, connections are pooled per
+    host by the mounted adapter and per request auth data is only added to the
+    outgoing request, never written into the shared session
+
+    :pool_connections: how many hosts keep a connection pool
+    :pool_maxsize: how many keep-alive connections are kept per host
+    :pool_block: cap connections to a host at pool_maxsize, blocking callers
+                 until one is released, instead of opening throwaway ones
+    :rate_limiter: RateLimiter pacing the requests, see ratelimit.py
+    :retry_policy: RetryPolicy resending failed requests, see retry.py
+    :single_flight: SingleFlight sharing the response of identical concurrent
+                    GETs, see coalesce.py, None to send every GET
+    :response_cache: ResponseCache serving and revalidating GETs, see
+                     cache.py, None to disable caching
+    :codec: Codec(or its name) encoding request and decoding response bodies
+    :hooks: Hooks notified of requests, responses, retries and renewals, see
+            metrics.py, None to skip the events
+    '''
 
+    # url the collections of the api are under, None if paths are urls
+    ROOT_URL = None
     MAX_RETRIES = 3
     TIMEOUT = 60
 
-    def __init__(self):
+    POOL_CONNECTIONS = 10
+    POOL_MAXSIZE = 10
+    POOL_BLOCK = False
+
+    def __init__(
+        self,
+        pool_connections: int = None,
+        pool_maxsize: int = None,
+        pool_block: bool = None,
+        rate_limiter: RateLimiter = None,
+        retry_policy: RetryPolicy = None,
+        single_flight: SingleFlight = None,
+        response_cache: ResponseCache = None,
+        codec: Codec = None,
+        hooks: Hooks = None,
+    ):
         self.session = requests.sessions.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections or self.POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or self.POOL_MAXSIZE,
+            pool_block=(self.POOL_BLOCK if pool_block is None else pool_block),
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.single_flight = single_flight
+        self.response_cache = response_cache
+        self.codec = get_codec(codec)
+        self.hooks = hooks
+
+        # bumped by every successful renew, so threads which got an expired
+        # response for an older session retry instead of renewing again
+        self.generation = 0
+        self.renew_lock = Lock()
+
+    @property
+    def backends(self):
+        ''' backends used by this interface '''
+        return [
+            helper.backend
+            for helper in (
+                self.rate_limiter,
+                self.single_flight,
+                self.response_cache,
+            )
+            if helper is not None and helper.backend is not None
+        ]
+
+    def use_codec(self, codec: Codec):
+        self.codec = get_codec(codec)
+        for backend in self.backends:
+            backend.codec = self.codec
+
+    def load_json(self, resp):
+        return self.codec.loads(resp.content)
 
     def renew_session(self):
         raise NotImplementedError
 
+    def renew(self, generation):
+        with self.renew_lock:
+            if generation != self.generation:
+                # renewed by another thread while this one was waiting
+                return True
+            renewed = self.renew_session()
+            if renewed:
+                self.generation += 1
+            if self.hooks is not None:
+                self.hooks.on_renew(bool(renewed))
+            return renewed
+
     def ensure_url(self, path):
         if path.startswith('http://') or path.startswith('https://'):
             return path
         return f'{self.ROOT_URL}{path}'
 
-    def retry(self, req, resp, retrying):
+    def request_key(self, path, params=None):
+        url = self.ensure_url(path)
+        if params:
+            url = f'{url}?{urlencode(sorted(params.items()))}'
+        return url
+
+    def retry(self, req, resp, retrying, expires=None):
         if retrying > self.MAX_RETRIES:
             raise error.MaxRetries(
                 f'exceed max retries for {req.method} {req.path_url}, '
                 f'last resp, {resp.status_code} {resp.content}'
             )
+        generation = self.generation
         req = self.renew_req(req)
-        return self.handle_resp(self.session.send(req), retrying)
+        # same settings as session.request, otherwise the adapter may pick
+        # another pool for the retried request and reconnect
+        settings = self.session.merge_environment_settings(
+            req.url, {}, None, None, None
+        )
+        self.throttle()
+        resp = self.observe(
+            req.method,
+            req.url,
+            self.session.send,
+            req,
+            timeout=self.get_timeout(None, expires),
+            **settings,
+        )
+        return self.handle_resp(resp, retrying, generation, expires)
+
+    def observe(self, method, url, send, *args, **kwargs):
+        ''' call send(*args, **kwargs), notifying the hooks '''
+        hooks = self.hooks
+        if hooks is None:
+            return send(*args, **kwargs)
+        hooks.pre_request(method, url)
+        started = perf_counter()
+        resp = send(*args, **kwargs)
+        hooks.post_response(method, url, resp, perf_counter() - started)
+        return resp
 
     def renew_req(self, req):
         return req
 
-    def handle_resp(self, resp, retrying=1):
+    def prepare_headers(self, headers):
+        return headers
+
+    def track_resp(self, resp):
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(resp)
+
+    def throttle(self):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+    def is_session_expired(self, resp):
+        return (
+            resp.status_code == 401 or b'session has expired' in resp.content
+        )
+
+    def get_timeout(self, timeout, expires):
+        '''timeout of the next send of a call, what is left before the call
+        expires(monotonic time) if it has a timeout in seconds
+        '''
+        if expires is None:
+            return self.TIMEOUT if timeout is None else timeout
+        left = expires - monotonic()
+        if left <= 0:
+            raise requests.Timeout('call timed out, retries included')
+        return left
+
+    def handle_resp(self, resp, retrying=1, generation=None, expires=None):
         resp.encoding = 'utf-8'
-        if resp.status_code == 401 or b'session has expired' in resp.content:
+        self.track_resp(resp)
+        if self.is_session_expired(resp):
             # session expired, renew and retry
-            if not self.renew_session():
+            if generation is None:
+                generation = self.generation
+            if not self.renew(generation):
                 raise error.NotAuthenticated()
-            return self.retry(resp.request, resp, retrying + 1)
+            return self.retry(resp.request, resp, retrying + 1, expires)
+        return self.check_resp(resp)
 
+    def check_resp(self, resp):
         if resp.ok:
             return resp
 
@@ -53,51 +216,129 @@ class BaseInterface:
             raise error.InvalidRequestData(f'{resp}: {resp.text}')
         if resp.status_code == 400:
             raise error.InvalidRequestData(f'{resp}: {resp.text}')
+        if resp.status_code == 429:
+            raise error.RateLimitExceeded(f'{resp}: {resp.text}')
         # have no idea what to do now, just raise requests error
         raise error.UnwantedResponse(f'{resp}: {resp.text}')
 
+    def request(self, method, path, retry=None, **kwargs):
+        '''Send request, resending it as the retry policy allows
+
+        a write drops the responses cached under the collection it touches,
+        whether it succeeds or not, see ResponseCache.invalidate
+
+        :retry: opt in(or out) of retrying, by default only idempotent
+                methods are retried
+        '''
+        if method == 'GET' or self.response_cache is None:
+            return self.send_request(method, path, retry, **kwargs)
+        try:
+            resp = self.send_request(method, path, retry, **kwargs)
+        except Exception:
+            self.invalidate_cached(path)
+            raise
+        self.invalidate_cached(path)
+        return resp
+
+    def invalidate_cached(self, path):
+        ''' drop the cached responses a write to path may have changed '''
+        try:
+            self.response_cache.invalidate(
+                self.ensure_url(path), self.ROOT_URL
+            )
+        except Exception as e:
+            # the outcome of the write matters more than the cache
+            logger.warning(f'invalidate cached responses of {path}, {e!r}')
+
+    def send_request(self, method, path, retry=None, **kwargs):
+        url = self.ensure_url(path)
+        headers = kwargs.pop('headers', None)
+        timeout = kwargs.pop('timeout', None)
+        body = kwargs.pop('json', None)
+        if body is not None:
+            kwargs['data'] = self.codec.dumps(body)
+            headers = {**(headers or {}), 'Content-Type': 'application/json'}
+        policy = self.retry_policy
+        started = monotonic()
+        # a timeout in seconds caps the whole call, waits and resends included
+        limit = timeout if isinstance(timeout, (int, float)) else None
+        expires = None if limit is None else started + limit
+        attempt = 1
+        while 1:
+            generation = self.generation
+            self.throttle()
+            try:
+                resp = self.observe(
+                    method,
+                    url,
+                    self.session.request,
+                    method,
+                    url,
+                    headers=self.prepare_headers(headers),
+                    timeout=self.get_timeout(timeout, expires),
+                    **kwargs,
+                )
+            except requests.ConnectionError:
+                delay = policy.get_delay(
+                    method, attempt, started, retry=retry, timeout=limit
+                )
+                if delay is None:
+                    raise
+            else:
+                if not policy.should_retry_resp(resp):
+                    return self.handle_resp(resp, 1, generation, expires)
+                delay = policy.get_delay(
+                    method,
+                    attempt,
+                    started,
+                    resp=resp,
+                    retry=retry,
+                    timeout=limit,
+                )
+                if delay is None:
+                    return self.handle_resp(resp, 1, generation, expires)
+                self.track_resp(resp)
+
+            policy.record(delay)
+            if self.hooks is not None:
+                self.hooks.on_retry(method, url, attempt, delay)
+            sleep(delay)
+            attempt += 1
+
+    def fetch(self, path, **kwargs):
+        ''' GET through the response cache '''
+        cache = self.response_cache
+        if cache is None:
+            return self.request('GET', path, **kwargs)
+
+        key = self.request_key(path, kwargs.get('params'))
+        entry = cache.lookup(key)
+        resp = cache.get_fresh(entry)
+        if resp is not None:
+            return resp
+        headers = {
+            **(kwargs.pop('headers', None) or {}),
+            **cache.get_validators(entry),
+        }
+        resp = self.request('GET', path, headers=headers, **kwargs)
+        return cache.update(key, entry, resp)
+
     def get(self, path, **kwargs):
-        resp = self.session.get(
-            self.ensure_url(path),
-            timeout=kwargs.pop('timeout', self.TIMEOUT),
-            **kwargs,
+        if self.single_flight is None:
+            return self.fetch(path, **kwargs)
+        return self.single_flight.do(
+            self.request_key(path, kwargs.get('params')),
+            lambda: self.fetch(path, **kwargs),
         )
-        return self.handle_resp(resp)
 
     def patch(self, path, data=None, json=None, **kwargs):
-        resp = self.session.patch(
-            self.ensure_url(path),
-            data=data,
-            json=json,
-            timeout=kwargs.pop('timeout', self.TIMEOUT),
-            **kwargs,
-        )
-        return self.handle_resp(resp)
+        return self.request('PATCH', path, data=data, json=json, **kwargs)
 
     def put(self, path, data=None, json=None, **kwargs):
-        resp = self.session.put(
-            self.ensure_url(path),
-            data=data,
-            json=json,
-            timeout=kwargs.pop('timeout', self.TIMEOUT),
-            **kwargs,
-        )
-        return self.handle_resp(resp)
+        return self.request('PUT', path, data=data, json=json, **kwargs)
 
     def post(self, path, data=None, json=None, **kwargs):
-        resp = self.session.post(
-            self.ensure_url(path),
-            data=data,
-            json=json,
-            timeout=kwargs.pop('timeout', self.TIMEOUT),
-            **kwargs,
-        )
-        return self.handle_resp(resp)
+        return self.request('POST', path, data=data, json=json, **kwargs)
 
     def delete(self, path, **kwargs):
-        resp = self.session.delete(
-            self.ensure_url(path),
-            timeout=kwargs.pop('timeout', self.TIMEOUT),
-            **kwargs,
-        )
-        return self.handle_resp(resp)
+        return self.request('DELETE', path, **kwargs)
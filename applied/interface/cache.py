@@ -0,0 +1,164 @@
+from threading import Lock
+from time import time
+from urllib.parse import urlsplit
+
+from requests.structures import CaseInsensitiveDict
+
+from ..backend import MISSING, BaseBackend, TTLCacheBackend
+from .utils import dumps_resp, loads_resp
+
+
+class ResponseCache:
+    '''Cache of GET responses, revalidated when the server supports it
+
+    a stored response is served without a request while it is fresh, the
+    freshness comes from the ttl of the model TYPE found in the url path,
+    once stale, a response with ETag/Last-Modified is revalidated by sending
+    If-None-Match/If-Modified-Since, a 304 reuses the stored body, responses
+    without validators are fetched again
+
+    a write(POST, PATCH, PUT, DELETE) sent by the interface drops the
+    responses it stored under the collection of the written resource: the
+    resource, its relationships and the pages of the collection; responses
+    stored by other processes sharing a RedisBackend are not known here and
+    stay served until they are stale, writes from elsewhere are not seen
+    either, keep the ttl of types written that way short
+
+    :backend: where bodies are stored, RedisBackend shares them across
+              processes, defaults to a TTLCacheBackend keeping them one hour
+    :namespace: prefix of the backend keys, keeps apart accounts sharing it
+    :ttl: seconds a response is fresh if its TYPE is not in ttls
+    :ttls: seconds a response is fresh per model TYPE, e.g. {'devices': 30}
+    :keep: seconds a response with validators is kept for revalidation
+    '''
+
+    TTL = 60
+    KEEP = 3600
+
+    def __init__(
+        self,
+        backend: BaseBackend = None,
+        namespace: str = '',
+        ttl: int = None,
+        ttls: dict = None,
+        keep: int = None,
+    ):
+        self.backend = backend or TTLCacheBackend(ttl=self.KEEP * 1000)
+        self.namespace = namespace
+        self.ttl = self.TTL if ttl is None else ttl
+        self.ttls = ttls or {}
+        self.keep = keep or self.KEEP
+
+        # keys of the responses stored by this cache, see invalidate
+        self.keys = set()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.lock = Lock()
+
+    @property
+    def stats(self):
+        served = self.hits + self.revalidated
+        total = served + self.misses
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'invalidated': self.invalidated,
+            'hit_ratio': served / total if total else 0,
+        }
+
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get_ttl(self, url):
+        # the last known TYPE wins, e.g. /v1/profiles/{id}/devices
+        ttl = self.ttl
+        for segment in urlsplit(url).path.split('/'):
+            ttl = self.ttls.get(segment, ttl)
+        return ttl
+
+    def get_key(self, key):
+        return f'response_{self.namespace}_{key}'
+
+    def lookup(self, key):
+        entry = self.backend.get(self.get_key(key))
+        if entry is MISSING:
+            return None
+        if isinstance(entry, (str, bytes)):
+            entry = self.backend.codec.loads(entry)
+        return entry
+
+    def get_fresh(self, entry):
+        ''' stored response if it can be served without a request '''
+        if entry is None or time() >= entry['expires_at']:
+            return None
+        self.count('hits')
+        return loads_resp(self.backend.codec, entry)
+
+    def get_validators(self, entry):
+        if entry is None:
+            return {}
+        headers = CaseInsensitiveDict(entry['headers'])
+        validators = {}
+        if 'ETag' in headers:
+            validators['If-None-Match'] = headers['ETag']
+        if 'Last-Modified' in headers:
+            validators['If-Modified-Since'] = headers['Last-Modified']
+        return validators
+
+    def update(self, key, entry, resp):
+        ''' store resp or, if it is a 304, refresh entry, returns response '''
+        now = time()
+        ttl = self.get_ttl(resp.url)
+        if resp.status_code == 304 and entry is not None:
+            self.count('revalidated')
+            entry['expires_at'] = now + ttl
+            self.backend.save(
+                self.get_key(key),
+                self.backend.codec.dumps(entry),
+                ttl=self.keep * 1000,
+            )
+            return loads_resp(self.backend.codec, entry)
+
+        self.count('misses')
+        if resp.status_code != 200:
+            return resp
+        has_validators = bool(self.get_validators({'headers': resp.headers}))
+        if ttl or has_validators:
+            self.backend.save(
+                self.get_key(key),
+                dumps_resp(self.backend.codec, resp, expires_at=now + ttl),
+                ttl=(self.keep if has_validators else ttl) * 1000,
+            )
+            with self.lock:
+                self.keys.add(key)
+        return resp
+
+    def invalidate(self, url, root):
+        '''Drop the stored responses under the collection of url
+
+        :url: url of the written resource or collection
+        :root: url the collections are under, e.g. ApiSession.ROOT_URL, the
+               url itself is the prefix if it is not under root or root is
+               None
+        '''
+        prefix = url.split('?', 1)[0]
+        if root is not None and prefix.startswith(f'{root}/'):
+            collection = prefix[len(root) + 1 :].split('/', 1)[0]
+            prefix = f'{root}/{collection}'
+        with self.lock:
+            keys = {
+                key
+                for key in self.keys
+                if key.startswith(prefix)
+                and key[len(prefix) : len(prefix) + 1] in ('', '/', '?')
+            }
+            self.keys -= keys
+            self.invalidated += len(keys)
+        # stale and without validators, in a shared backend too
+        tombstone = self.backend.codec.dumps({'expires_at': 0, 'headers': {}})
+        for key in keys:
+            self.backend.save(self.get_key(key), tombstone, self.keep * 1000)
@@ -0,0 +1,140 @@
+import asyncio
+from threading import Event, Lock
+from time import sleep
+from uuid import uuid4
+
+from applied import logger
+
+from ..backend import MISSING, BaseBackend
+from .utils import dumps_resp, loads_resp
+
+
+class Flight:
+    def __init__(self):
+        self.done = Event()
+        self.resp = None
+        self.error = None
+
+
+class SingleFlight:
+    '''Share one in-flight response between identical concurrent requests
+
+    threads asking for a key already being fetched wait for that response
+    instead of sending their own, with a backend shared by several processes
+    (RedisBackend) one process fetches and the others pick the response up
+    from the backend, only successful responses are shared across processes
+
+    a waiting process polls for the response while the fetching one holds
+    its lock, and fetches itself once the lock is released without a
+    response, e.g. the request failed, or has expired, after backend.TIMEOUT
+
+    :backend: coordinates processes, None to coalesce in this process only
+    :namespace: prefix of the backend keys, keeps apart accounts sharing it
+    :ttl: milliseconds a shared response is kept for waiting processes, well
+          above POLL for them to find it
+    '''
+
+    TTL = 5000
+    # seconds between polls of a waiting process
+    POLL = 0.05
+
+    def __init__(
+        self, backend: BaseBackend = None, namespace: str = '', ttl=None
+    ):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl or self.TTL
+        self.flights = {}
+        # futures of do_async, apart from the Flights of threads
+        self.tasks = {}
+        self.lock = Lock()
+
+    def do(self, key, func):
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.resp
+
+        try:
+            flight.resp = self.fetch(key, func)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        return flight.resp
+
+    async def do_async(self, key, func):
+        # event loop only, futures are not shared with threads or processes
+        with self.lock:
+            task = self.tasks.get(key)
+            leader = task is None
+            if leader:
+                task = self.tasks[key] = asyncio.ensure_future(func())
+        if not leader:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.shield(task)
+        finally:
+            with self.lock:
+                if self.tasks.get(key) is task:
+                    del self.tasks[key]
+
+    def fetch(self, key, func):
+        backend = self.backend
+        if backend is None:
+            return func()
+
+        key = f'single_flight_{self.namespace}_{key}'
+        lock_name = f'renew_{key}'
+        identity = str(uuid4())
+        if backend.request_renew(lock_name, identity, backend.TIMEOUT):
+            try:
+                resp = func()
+                # tagged, waiters tell it from the response of a former flight
+                value = dumps_resp(backend.codec, resp, flight=identity)
+                backend.save(key, value, ttl=self.ttl)
+                # the local copy would outlive ttl, and serve later waits
+                backend.clear(key)
+                return resp
+            finally:
+                backend.finish_renew(lock_name, identity)
+
+        # another process is fetching, wait for it
+        logger.debug(f'wait single flight, {key}')
+        value = self.wait(key, lock_name)
+        backend.clear(key)
+        if value is MISSING:
+            return func()
+        return loads_resp(backend.codec, value)
+
+    def wait(self, key, lock_name):
+        '''response shared by the process holding lock_name, MISSING if it
+        releases the lock without one
+        '''
+        backend = self.backend
+        leader = backend.get_renewer(lock_name)
+        while 1:
+            # checked in this order, the response is saved before the lock
+            # is released
+            renewer = backend.get_renewer(lock_name)
+            # read from the shared backend, not a copy of an earlier flight
+            backend.clear(key)
+            value = backend.get(key)
+            if value is not MISSING and (
+                leader is None or value.get('flight') == leader
+            ):
+                return value
+            if renewer != leader or renewer is None:
+                # released without a response, or taken by another flight
+                return MISSING
+            sleep(self.POLL)
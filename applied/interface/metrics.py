@@ -0,0 +1,196 @@
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from threading import Lock
+from urllib.parse import urlsplit
+
+
+class Hooks:
+    '''Events emitted by the interfaces, all of them do nothing here
+
+    subclass and override the events of interest, then pass an instance as
+    the `hooks` option of an interface, interfaces without hooks skip the
+    events entirely
+    '''
+
+    def pre_request(self, method: str, url: str):
+        pass
+
+    def post_response(self, method: str, url: str, resp, elapsed: float):
+        ''' elapsed: seconds between sending and receiving the response '''
+
+    def on_retry(self, method: str, url: str, attempt: int, delay: float):
+        ''' a failed request is sent again after delay seconds '''
+
+    def on_renew(self, renewed: bool):
+        ''' the session expired and renewing it succeeded or not '''
+
+    def on_page(self, model_type: str):
+        ''' a page of models was loaded into a Result '''
+
+
+class Histogram:
+
+    # upper bounds in seconds
+    BUCKETS = (
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+        float('inf'),
+    )
+
+    def __init__(self, buckets=None):
+        self.buckets = buckets or self.BUCKETS
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def as_dict(self):
+        cumulative, total = {}, 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            cumulative[bound] = total
+        return {'buckets': cumulative, 'sum': self.sum, 'count': self.count}
+
+
+class Metrics(Hooks):
+    '''In memory aggregation of the interface events
+
+    latency histograms, bytes and status codes are kept per endpoint, which
+    is the method and the url path with resource ids replaced, e.g.:
+        GET /v1/profiles/{id}/devices
+    snapshot() returns them as a dict, render() in prometheus text format
+    '''
+
+    # numeric ids, uuids and opaque ids, upper case alphanumerics with a
+    # digit and at least 10 long, e.g. devices/8YG9N45VWX
+    ID_SEGMENT = re.compile(
+        r'^(\d+'
+        r'|[0-9a-fA-F]{8}(-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}'
+        r'|(?=[A-Z]*\d)[A-Z0-9]{10,})$'
+    )
+
+    def __init__(self, buckets=None):
+        self.buckets = buckets
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.latency = defaultdict(lambda: Histogram(self.buckets))
+            self.status_codes = defaultdict(Counter)
+            self.bytes_sent = Counter()
+            self.bytes_received = Counter()
+            self.retries = Counter()
+            self.renewals = Counter()
+            self.pages = Counter()
+
+    @classmethod
+    def endpoint(cls, method, url):
+        path = urlsplit(url).path
+        segments = [
+            '{id}' if cls.ID_SEGMENT.match(segment) else segment
+            for segment in path.split('/')
+        ]
+        return f'{method.upper()} {"/".join(segments)}'
+
+    def post_response(self, method, url, resp, elapsed):
+        endpoint = self.endpoint(method, url)
+        body = getattr(resp.request, 'body', None)
+        if not isinstance(body, (bytes, str)):
+            # streamed or not sent
+            body = b''
+        with self.lock:
+            self.latency[endpoint].observe(elapsed)
+            self.status_codes[endpoint][resp.status_code] += 1
+            self.bytes_sent[endpoint] += len(body)
+            self.bytes_received[endpoint] += len(resp.content)
+
+    def on_retry(self, method, url, attempt, delay):
+        with self.lock:
+            self.retries[self.endpoint(method, url)] += 1
+
+    def on_renew(self, renewed):
+        with self.lock:
+            self.renewals['renewed' if renewed else 'failed'] += 1
+
+    def on_page(self, model_type):
+        with self.lock:
+            self.pages[model_type] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'latency': {
+                    endpoint: histogram.as_dict()
+                    for endpoint, histogram in self.latency.items()
+                },
+                'status_codes': {
+                    endpoint: dict(counter)
+                    for endpoint, counter in self.status_codes.items()
+                },
+                'bytes_sent': dict(self.bytes_sent),
+                'bytes_received': dict(self.bytes_received),
+                'retries': dict(self.retries),
+                'renewals': dict(self.renewals),
+                'pages': dict(self.pages),
+            }
+
+    def render(self, prefix='applied'):
+        ''' prometheus text exposition format '''
+        snapshot = self.snapshot()
+        lines = []
+        for endpoint, histogram in snapshot['latency'].items():
+            method, path = endpoint.split(' ', 1)
+            labels = f'method="{method}",path="{path}"'
+            for bound, count in histogram['buckets'].items():
+                le = '+Inf' if bound == float('inf') else bound
+                lines.append(
+                    f'{prefix}_request_seconds_bucket{{{labels},le="{le}"}} '
+                    f'{count}'
+                )
+            lines.append(
+                f'{prefix}_request_seconds_sum{{{labels}}} {histogram["sum"]}'
+            )
+            lines.append(
+                f'{prefix}_request_seconds_count{{{labels}}} '
+                f'{histogram["count"]}'
+            )
+            for code, count in snapshot['status_codes'][endpoint].items():
+                lines.append(
+                    f'{prefix}_responses_total{{{labels},code="{code}"}} '
+                    f'{count}'
+                )
+            for name in ('bytes_sent', 'bytes_received'):
+                lines.append(
+                    f'{prefix}_{name}_total{{{labels}}} '
+                    f'{snapshot[name].get(endpoint, 0)}'
+                )
+        for endpoint, count in snapshot['retries'].items():
+            method, path = endpoint.split(' ', 1)
+            lines.append(
+                f'{prefix}_retries_total{{method="{method}",path="{path}"}} '
+                f'{count}'
+            )
+        for result, count in snapshot['renewals'].items():
+            lines.append(
+                f'{prefix}_renewals_total{{result="{result}"}} {count}'
+            )
+        for model_type, count in snapshot['pages'].items():
+            lines.append(
+                f'{prefix}_pages_total{{type="{model_type}"}} {count}'
+            )
+        return '\n'.join(lines) + '\n'
@@ -23,8 +23,9 @@ class PortalSession(BaseInterface):
         password: str,
         two_factor_callback: Callable,
         backend=None,
+        **kwargs,
     ):
-        super().__init__()
+        super().__init__(**kwargs)
         if not (username and password):
             raise error.InvalidAuthCredential(username, password)
         self.username = username
@@ -40,10 +41,14 @@ class PortalSession(BaseInterface):
     def is_session_valid(self):
         resp = self.session.get(f'{self.APC_OLYMPUS_V1}/session')
         if resp.ok:
-            self.load_olympus_session(resp.json())
+            self.load_olympus_session(self.load_json(resp))
             return True
         return False
 
+    @property
+    def backends(self):
+        return [*super().backends, self.backend]
+
     @property
     def team_id(self):
         if not hasattr(self, '_team_id'):
@@ -69,17 +74,17 @@ class PortalSession(BaseInterface):
         )
         if not resp.ok:
             raise error.UnwantedResponse('service key is missing')
-        return resp.json()['authServiceKey']
+        return self.load_json(resp)['authServiceKey']
 
     @cache('{self.username}_list_teams', default=[])
     def list_teams(self):
         resp = self.post(f'{self.DEV_QH65B2}/account/listTeams.action')
-        return resp.json()['teams']
+        return self.load_json(resp)['teams']
 
     @cache('{self.username}_get_teams', default=[])
     def get_teams(self):
         resp = self.post(f'{self.DEV_QH65B2}/account/getTeams')
-        return resp.json()['teams']
+        return self.load_json(resp)['teams']
 
     def load_olympus_session(self, data):
         self.olympus_session = data
@@ -210,7 +215,7 @@ class PortalSession(BaseInterface):
             )
 
         options_resp.encoding = 'utf-8'
-        data = options_resp.json()
+        data = self.load_json(options_resp)
         # applied only handle two factor now
         if 'trustedPhoneNumbers' in data:
             self.two_factor_callback(
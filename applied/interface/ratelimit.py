@@ -0,0 +1,79 @@
+from time import sleep
+
+from applied import logger
+
+from ..backend import BaseBackend, TTLCacheBackend
+
+
+class RateLimiter:
+    '''Token bucket pacing requests to the quota apple reports
+
+    apple returns the hourly quota of the api key in every response, e.g.:
+        X-Rate-Limit: user-hour-lim:3500;user-hour-rem:3499;
+    the bucket refills at limit / PERIOD tokens per second and holds at most
+    burst tokens, the remaining quota from the header caps the bucket, so
+    requests are spread over the hour instead of running into 429s
+
+    the bucket lives in the backend, a RedisBackend shares it across
+    processes using the same key
+
+    :key: name of the bucket, usually the api key id
+    :limit: quota per period until the first response tells the real one
+    :burst: how many requests may be sent back to back
+    '''
+
+    HEADER = 'X-Rate-Limit'
+    PERIOD = 3600
+    LIMIT = 3500
+    BURST = 100
+
+    def __init__(
+        self,
+        key: str,
+        backend: BaseBackend = None,
+        limit: int = None,
+        burst: int = None,
+    ):
+        self.key = f'rate_limit_{key}'
+        self.backend = backend or TTLCacheBackend(ttl=self.PERIOD * 1000)
+        self.limit = limit or self.LIMIT
+        self.burst = burst or self.BURST
+
+    @property
+    def rate(self):
+        return self.limit / self.PERIOD
+
+    def reserve(self) -> float:
+        ''' take a token, returns seconds to wait before trying again '''
+        return self.backend.take_token(
+            self.key, self.rate, min(self.burst, self.limit)
+        )
+
+    def acquire(self):
+        wait = self.reserve()
+        while wait > 0:
+            logger.debug(f'{self.key} throttled, wait {wait:.3f}s')
+            sleep(wait)
+            wait = self.reserve()
+
+    @classmethod
+    def parse_header(cls, value: str) -> dict:
+        quota = {}
+        for item in value.split(';'):
+            name, sep, number = item.partition(':')
+            if sep and number.strip().isdigit():
+                quota[name.strip()] = int(number)
+        return quota
+
+    def update(self, resp):
+        value = resp.headers.get(self.HEADER)
+        if resp.status_code == 429:
+            # quota is used up, whatever the bucket thinks
+            self.backend.cap_tokens(self.key, 0)
+        if not value:
+            return
+        quota = self.parse_header(value)
+        if 'user-hour-lim' in quota:
+            self.limit = max(quota['user-hour-lim'], 1)
+        if 'user-hour-rem' in quota:
+            self.backend.cap_tokens(self.key, quota['user-hour-rem'])
@@ -0,0 +1,104 @@
+from email.utils import parsedate_to_datetime
+from random import uniform
+from threading import Lock
+from time import monotonic, time
+
+
+class RetryPolicy:
+    '''When and how long to wait before resending a failed request
+
+    throttled(429), server errors(5xx) and connection errors are retried with
+    exponential backoff, a Retry-After header from the server wins over the
+    backoff, get/put/delete are retried by default, post/patch only when the
+    call opts in with `retry=True`
+
+    :max_retries: resends after the first attempt
+    :backoff: seconds to wait before the first resend, doubled every time
+    :max_backoff: upper bound of the backoff
+    :jitter: wait a random time between 0 and the backoff(full jitter)
+    :deadline: seconds a call may take including the waits, None for no limit,
+        the timeout of a call caps it
+    '''
+
+    STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+    IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+        jitter: bool = True,
+        deadline: float = None,
+        status_codes: set = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self.status_codes = status_codes or self.STATUS_CODES
+
+        self.retries = 0
+        self.sleep_time = 0.0
+        self.lock = Lock()
+
+    @property
+    def stats(self):
+        return {'retries': self.retries, 'sleep_time': self.sleep_time}
+
+    def should_retry_resp(self, resp):
+        return resp.status_code in self.status_codes
+
+    def get_retry_after(self, resp):
+        value = resp.headers.get('Retry-After') if resp is not None else None
+        if not value:
+            return None
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def get_backoff(self, attempt):
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = uniform(0, delay)
+        return delay
+
+    def get_delay(
+        self, method, attempt, started, resp=None, retry=None, timeout=None
+    ):
+        '''Seconds to wait before resending, None if it should not be retried
+
+        :attempt: how many times the request has been sent
+        :started: monotonic time the call started, for the deadline
+        :retry: opt in(or out) regardless of the method
+        :timeout: seconds the call may take, caps the deadline
+        '''
+        if attempt > self.max_retries:
+            return None
+        if retry is None:
+            retry = method.upper() in self.IDEMPOTENT_METHODS
+        if not retry:
+            return None
+        delay = self.get_retry_after(resp)
+        if delay is None:
+            delay = self.get_backoff(attempt)
+        deadline = self.deadline
+        if timeout is not None:
+            deadline = timeout if deadline is None else min(deadline, timeout)
+        if deadline is not None and monotonic() + delay - started > deadline:
+            return None
+        return delay
+
+    def record(self, delay):
+        with self.lock:
+            self.retries += 1
+            self.sleep_time += delay
+
+    def reset_stats(self):
+        with self.lock:
+            self.retries = 0
+            self.sleep_time = 0.0
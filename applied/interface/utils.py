@@ -0,0 +1,30 @@
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from ..codec import Codec
+
+
+def dumps_resp(codec: Codec, resp, **extra):
+    ''' serialize a read response, so it can be stored in a backend '''
+    return codec.dumps(
+        {
+            'url': resp.url,
+            'status_code': resp.status_code,
+            # aiohttp keys are istr, which orjson does not take as str
+            'headers': {str(k): v for k, v in resp.headers.items()},
+            'content': resp.content.decode(resp.encoding or 'utf-8'),
+            **extra,
+        }
+    )
+
+
+def loads_resp(codec: Codec, value) -> Response:
+    if isinstance(value, (str, bytes)):
+        value = codec.loads(value)
+    resp = Response()
+    resp.url = value['url']
+    resp.status_code = value['status_code']
+    resp.headers = CaseInsensitiveDict(value['headers'])
+    resp.encoding = 'utf-8'
+    resp._content = value['content'].encode('utf-8')
+    return resp
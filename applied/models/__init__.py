@@ -5,6 +5,7 @@ __all__ = (
     'Capability',
     'Certificate',
     'Device',
+    'ModelCache',
     'Profile',
     'Provider',
     'User',
@@ -13,6 +14,7 @@ __all__ = (
 from .api_key import ApiKey
 from .app import App
 from .bundle import BundleId
+from .cache import ModelCache
 from .capability import Capability
 from .certificate import Certificate
 from .device import Device
@@ -65,7 +65,7 @@ class ApiKey(BaseModel):
         resp = portal.post(
             f'{portal.APC_IRIS_V1}/{cls.TYPE}', json={'data': data}
         )
-        return cls.from_json(resp.json())
+        return cls.from_json(portal.load_json(resp))
 
     @classmethod
     def get(cls, pk, *, includes=()):
@@ -75,15 +75,18 @@ class ApiKey(BaseModel):
         resp = portal.get(
             f'{portal.APC_IRIS_V1}/{cls.TYPE}/{pk}', params=params,
         )
-        return cls.from_json(resp.json())
+        return cls.from_json(portal.load_json(resp))
 
     @classmethod
     def find(cls, *, includes=()):
         q = Query(includes=includes)
-        params = q.get_params(cls)
+        return cls.fetch(q.get_params(cls))
+
+    @classmethod
+    def fetch(cls, params, incremental=False, prefetch=0):
         portal = cls.client.portal_session
         resp = portal.get(f'{portal.APC_IRIS_V1}/{cls.TYPE}', params=params)
-        return Result(cls, params, resp.json())
+        return Result(cls, params, portal.load_json(resp))
 
     def download_private_key(self):
         portal = self.client.portal_session
@@ -92,7 +95,7 @@ class ApiKey(BaseModel):
             params={'fields[apiKeys]': 'privateKey', 'include': 'provider'},
         )
         if resp.ok:
-            data = resp.json()
+            data = portal.load_json(resp)
             self.private_key = b64decode(
                 data['data']['attributes']['privateKey']
             ).decode()
@@ -1,21 +1,130 @@
-from dataclasses import dataclass, asdict, MISSING
+from copy import deepcopy
+from dataclasses import MISSING, dataclass, fields, is_dataclass
+from functools import wraps
 
 from applied import error
 
-from .queryset import Query, Result
+from . import bulk
+from .decoder import Decoder
+from .document import Document
+from .lazy import LazyRelationship, Related
+from .queryset import Objects, Query, QuerySet, Result
 
 
-def delegate(model, client):
+def index_included(included) -> dict:
+    '''(type, id) index of the included resources of a document
+
+    built once per document and passed down instead of the included list,
+    an index passed in is returned as is
+    '''
+    if isinstance(included, dict):
+        return included
+    # reversed, so the first of duplicated resources wins, as a scan would
+    return {(ele['type'], ele['id']): ele for ele in reversed(included)}
+
+
+def to_dict(value, resolve, path):
+    '''dataclasses.asdict, which neither resolves nor loops forever
+
+    :resolve: resolve lazy relationships of value, related models only show
+              what they already resolved
+    :path: ids of the models being converted, a model met again down its
+           own relationships is shown as its type and id
+    '''
+    if isinstance(value, BaseModel):
+        if id(value) in path:
+            return {'type': value.TYPE, 'id': value.id}
+        path.add(id(value))
+        result = {
+            field.name: to_dict(
+                getattr(value, field.name)
+                if resolve
+                else value.peek(field.name),
+                False,
+                path,
+            )
+            for field in fields(value)
+        }
+        path.discard(id(value))
+        return result
+    if is_dataclass(value) and not isinstance(value, type):
+        return {
+            field.name: to_dict(getattr(value, field.name), False, path)
+            for field in fields(value)
+        }
+    if isinstance(value, Related):
+        return deepcopy(value.data)
+    if isinstance(value, (list, tuple)):
+        return type(value)(to_dict(ele, False, path) for ele in value)
+    if isinstance(value, dict):
+        return {
+            to_dict(key, False, path): to_dict(ele, False, path)
+            for key, ele in value.items()
+        }
+    return deepcopy(value)
+
+
+def delegate(model, client, *mixins):
+    # no __dict__ of its own keeps compact models compact, see compact
+    slots = tuple(
+        slot
+        for mixin in mixins
+        for slot in getattr(mixin, 'INSTANCE_SLOTS', ())
+    )
     return type(
-        model.__name__, (model,), {'client': client, 'delegated': True},
+        model.__name__,
+        (*mixins, model),
+        {'client': client, 'delegated': True, '__slots__': slots},
     )
 
 
+def compact(model):
+    '''Copy of the model class keeping its fields in __slots__
+
+    instances of the copy have no __dict__, which is most of the memory of a
+    model holding a few short strings; it has the fields, methods and
+    constants of model but is not a subclass of it, isinstance checks
+    against model do not hold
+    '''
+    fields = tuple(model.__dataclass_fields__)
+    namespace = {
+        name: value
+        for name, value in model.__dict__.items()
+        # field defaults would shadow the slots, __init__ has its own copy
+        if name not in fields
+        and name not in ('__dict__', '__weakref__', 'DECODER')
+    }
+    # weakref keeps compact models usable in the client identity map
+    namespace['__slots__'] = (*fields, '__weakref__')
+
+    # dataclass __init__ leaves not init fields with a plain default to the
+    # class attribute, which the slot replaces
+    defaults = {
+        name: field.default
+        for name, field in model.__dataclass_fields__.items()
+        if not field.init and field.default is not MISSING
+    }
+    if defaults:
+        init = model.__init__
+
+        @wraps(init)
+        def __init__(self, *args, **kwargs):
+            for name, value in defaults.items():
+                setattr(self, name, value)
+            init(self, *args, **kwargs)
+
+        namespace['__init__'] = __init__
+    return type(model)(model.__name__, model.__bases__, namespace)
+
+
 @dataclass
 class BaseModel:
 
     id: str
 
+    # no __dict__ of its own, so compact copies of the models can do without
+    __slots__ = ()
+
     TYPE = None
 
     FILTER_FIELDS = set()
@@ -24,6 +133,19 @@ class BaseModel:
     SORT_FIELDS = set()
     RELATED_LIMIT = {}
 
+    # a new QuerySet of QUERY_SET per access, see QuerySet
+    objects = Objects()
+    QUERY_SET = QuerySet
+
+    # requests in flight at once in bulk operations, as many as the
+    # connections a session pools per host by default
+    BULK_WORKERS = 10
+
+    # compiled by get_decoder, per class
+    DECODER = None
+    # relationships left unresolved until read, see lazy.LazyModel
+    LAZY_RELATIONSHIPS = frozenset()
+
     @classmethod
     def create(cls, **kwargs):
         '''Create model instance
@@ -31,15 +153,55 @@ class BaseModel:
         :kwargs: will be passed to build_create_data for validation
         '''
         data = cls.build_create_data(**kwargs)
-        resp = cls.client.api_session.post(f'/{cls.TYPE}', json={'data': data})
-        return cls.from_json(resp.json())
+        session = cls.client.api_session
+        resp = session.post(f'/{cls.TYPE}', json={'data': data})
+        json_data = session.load_json(resp)
+        cls.invalidate_cached(data, json_data['data'])
+        return cls.from_json(json_data)
+
+    @classmethod
+    def bulk_create(cls, items, *, workers=None) -> bulk.BulkResult:
+        '''Create a model instance per kwargs of items, concurrently
+
+        :workers: requests in flight at once, BULK_WORKERS by default
+        '''
+        return bulk.run(
+            lambda kwargs: cls.create(**kwargs),
+            items,
+            workers or cls.BULK_WORKERS,
+        )
+
+    @classmethod
+    def bulk_update(cls, items, *, workers=None) -> bulk.BulkResult:
+        ''' update models concurrently, items are (model, kwargs) pairs '''
+        return bulk.run(
+            lambda pair: pair[0].update(**pair[1]),
+            items,
+            workers or cls.BULK_WORKERS,
+        )
+
+    @classmethod
+    def bulk_delete(cls, models, *, workers=None) -> bulk.BulkResult:
+        ''' delete models concurrently, values are what delete returned '''
+        return bulk.run(
+            lambda model: model.delete(), models, workers or cls.BULK_WORKERS
+        )
 
     @classmethod
     def get(cls, pk, *, includes=()):
+        cache = cls.client.model_cache
+        if cache is not None:
+            json_data = cache.get(cls, pk, includes)
+            if json_data is not None:
+                return cls.from_json(json_data)
         q = Query(includes=includes)
         params = q.get_params(cls)
-        resp = cls.client.api_session.get(f'/{cls.TYPE}/{pk}', params=params)
-        return cls.from_json(resp.json())
+        session = cls.client.api_session
+        resp = session.get(f'/{cls.TYPE}/{pk}', params=params)
+        json_data = session.load_json(resp)
+        if cache is not None:
+            cache.save(cls, pk, includes, json_data)
+        return cls.from_json(json_data)
 
     @classmethod
     def find(
@@ -51,7 +213,16 @@ class BaseModel:
         sorts=(),
         limit=20,
         related_limits={},
+        incremental=False,
+        prefetch=0,
     ):
+        '''Find model instances
+
+        :incremental: decode pages item by item while iterating the result,
+                      keeps memory low on pages with large attributes
+        :prefetch: pages fetched ahead in the background while iterating the
+                   result, 0 to fetch a page once the previous one is done
+        '''
         q = Query(
             filters=filters,
             fields=fields,
@@ -60,9 +231,18 @@ class BaseModel:
             limit=limit,
             related_limits=related_limits,
         )
-        params = q.get_params(cls)
-        resp = cls.client.api_session.get(f'/{cls.TYPE}', params=params)
-        return Result(cls, params, resp.json())
+        return cls.fetch(q.get_params(cls), incremental, prefetch)
+
+    @classmethod
+    def fetch(cls, params, incremental=False, prefetch=0) -> Result:
+        ''' Result of the models matching compiled params, see find '''
+        session = cls.client.api_session
+        resp = session.get(f'/{cls.TYPE}', params=params)
+        if incremental:
+            return Result(
+                cls, params, Document(resp.text), True, prefetch=prefetch
+            )
+        return Result(cls, params, session.load_json(resp), prefetch=prefetch)
 
     @classmethod
     def count(cls):
@@ -72,93 +252,160 @@ class BaseModel:
 
     def update(self, **kwargs):
         update_data = self.build_update_data(**kwargs)
-        resp = self.client.api_session.patch(
-            f'/{self.TYPE}/{self.id}', json=update_data,
-        )
-        json_data = resp.json()
+        session = self.client.api_session
+        resp = session.patch(f'/{self.TYPE}/{self.id}', json=update_data)
+        json_data = session.load_json(resp)
+        self.invalidate_cached(update_data, json_data['data'])
+        return self.reload_from_json(json_data)
+
+    def delete(self) -> bool:
+        resp = self.client.api_session.delete(f'/{self.TYPE}/{self.id}')
+        self.invalidate_cached({'type': self.TYPE, 'id': self.id})
+        return resp.ok and resp.status_code == 204
+
+    @classmethod
+    def invalidate_cached(cls, *resources):
+        ''' drop the cached documents of the resources written, see get '''
+        cache = cls.client.model_cache
+        if cache is not None:
+            for resource in resources:
+                cache.invalidate(resource)
+
+    def reload_from_json(self, json_data):
         data = json_data['data']
         self.update_attributes(
             self.filter_attributes(data['attributes'], False)
         )
         self.update_relationships(
-            data.get('relationships', {}), json_data.get('included', [])
+            data.get('relationships', {}),
+            index_included(json_data.get('included', [])),
+            {(self.TYPE, self.id): self},
         )
         return self
 
-    def delete(self) -> bool:
-        resp = self.client.api_session.delete(f'/{self.TYPE}/{self.id}')
-        return resp.ok and resp.status_code == 204
-
     @classmethod
     def from_json(cls, json_data):
         # TODO: what to do with unknown fields?
         data = json_data['data']
-        included = json_data.get('included', [])
+        included = index_included(json_data.get('included', []))
+        identities = {}
 
         if isinstance(data, dict):
-            return cls.to_model(data, included)
+            return cls.to_model(data, included, identities)
         elif isinstance(data, list):
-            return [cls.to_model(ele, included) for ele in data]
+            return [cls.to_model(ele, included, identities) for ele in data]
         else:
             raise error.UnknownModelData(data)
 
     @classmethod
-    def to_model(cls, data, included):
-        model = cls.client.MODEL_CLASSES.get(data['type'])
+    def iter_document(cls, document):
+        ''' yields models as the data items of document are decoded '''
+        included = index_included(document.members.get('included', []))
+        identities = {}
+        for data in document.iter_data():
+            if not isinstance(data, dict):
+                raise error.UnknownModelData(data)
+            yield cls.to_model(data, included, identities)
+
+    @classmethod
+    def to_model(cls, data, included, identities=None):
+        '''Build the model of a resource object
+
+        a resource is built once per document, every relationship to it
+        shares that model, and once per client if it keeps an identity map,
+        then the model is updated in place by later documents
+
+        :included: included resources of the document, or their index
+        :identities: models already built from the document by (type, id)
+        '''
+        type_, rid = data['type'], data['id']
+        if identities:
+            ins = identities.get((type_, rid))
+            if ins is not None:
+                return ins
+        elif identities is None:
+            identities = {}
+        client = cls.client
+        model = client.MODEL_CLASSES.get(type_)
         if not model:
-            raise error.UnknownModelType(data['type'])
-        values = {'id': data['id']}
-        values.update(model.filter_attributes(data.get('attributes', {})))
-        ins = model(**values)
-        ins.update_relationships(data.get('relationships', {}), included)
+            raise error.UnknownModelType(type_)
+
+        shared = client.identity_map
+        ins = None if shared is None else shared.get((type_, rid))
+        if ins is None:
+            ins = model.build(rid, data.get('attributes', {}))
+            if shared is not None:
+                shared[(type_, rid)] = ins
+        else:
+            # a sparse fieldset only updates the attributes it has
+            ins.update_attributes(
+                model.filter_attributes(data.get('attributes', {}), False)
+            )
+        if included:
+            # registered before the relationships, which may lead back to it
+            identities[(type_, rid)] = ins
+        relationships = data.get('relationships')
+        if relationships:
+            ins.update_relationships(
+                relationships, index_included(included), identities
+            )
         return ins
 
+    @classmethod
+    def build(cls, rid, attributes):
+        ''' model of the resource rid, from its attributes '''
+        values = cls.filter_attributes(attributes)
+        values['id'] = rid
+        return cls(**values)
+
+    @classmethod
+    def get_decoder(cls) -> Decoder:
+        # looked up in the class itself, so subclasses, delegated ones
+        # included, compile a decoder of their own fields
+        decoder = cls.__dict__.get('DECODER')
+        if decoder is None:
+            decoder = cls.DECODER = Decoder(cls)
+        return decoder
+
     @classmethod
     def filter_attributes(cls, attributes, fill_missing=True):
-        values = {}
-        for name, field in cls.__dataclass_fields__.items():
-            if name == 'id':
-                continue
-            source = field.metadata.get('source', name)
-            try:
-                value = attributes[source]
-            except KeyError:
-                try:
-                    value = attributes[name]
-                except KeyError:
-                    if not fill_missing or not field.init:
-                        continue
-                    if field.default_factory is not MISSING:
-                        value = field.default_factory()
-                    elif field.default is not MISSING:
-                        value = field.default
-                    else:
-                        value = field.type()
-            values[name] = value
-        return values
-
-    @classmethod
-    def map_included(cls, relation, included):
-        data = {}
-        rid, rtype = relation['id'], relation['type']
-        for include in included:
-            if include['id'] == rid and include['type'] == rtype:
-                data = include
-                break
+        return cls.get_decoder().decode(attributes, fill_missing)
+
+    @classmethod
+    def map_included(cls, relation, included, identities=None):
+        key = (relation['type'], relation['id'])
+        if identities is not None and key in identities:
+            return identities[key]
+        included = index_included(included)
+        data = included.get(key)
         if data:
-            return cls.to_model(data, included)
+            return cls.to_model(data, included, identities)
 
-    def update_relationships(self, relationships, included):
+    def update_relationships(self, relationships, included, identities=None):
         attributes = {}
+        included = index_included(included)
+        if identities is None:
+            identities = {(self.TYPE, self.id): self}
         map_included = self.map_included
+        lazy = self.LAZY_RELATIONSHIPS
         for key, value in relationships.items():
             data = value.get('data')
+            if key in lazy and (data or 'data' not in value):
+                url = value.get('links', {}).get('related')
+                if data or url:
+                    attributes[key] = Related(data, url, included, identities)
+                continue
             if not data:
+                # an empty linkage clears what an earlier document linked
+                if 'data' in value:
+                    attributes[key] = [] if isinstance(data, list) else None
                 continue
             if isinstance(data, dict):
-                attributes[key] = map_included(data, included)
+                attributes[key] = map_included(data, included, identities)
             elif isinstance(data, list):
-                attributes[key] = [map_included(ele, included) for ele in data]
+                attributes[key] = [
+                    map_included(ele, included, identities) for ele in data
+                ]
         self.update_attributes(self.filter_attributes(attributes, False))
         return self
 
@@ -168,5 +415,17 @@ class BaseModel:
             if name in fields:
                 setattr(self, name, value)
 
+    def peek(self, name):
+        ''' value of field name, a Related if it is not resolved yet '''
+        attr = getattr(type(self), name, None)
+        if isinstance(attr, LazyRelationship):
+            return attr.peek(self)
+        return getattr(self, name)
+
     def as_dict(self):
-        return asdict(self)
+        '''Fields as a dict, related models converted as well
+
+        lazy relationships of the model are resolved, unresolved ones of
+        related models are shown as their linkage
+        '''
+        return to_dict(self, True, set())
@@ -0,0 +1,108 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from applied import error, logger
+
+
+@dataclass
+class BulkItem:
+
+    index: int
+    item: Any
+    value: Any = None
+    error: Exception = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class BulkResult:
+    '''Outcome of a bulk operation, a BulkItem per item in the order given
+
+    an item failing does not stop the others, its exception is kept instead
+    '''
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    @property
+    def succeeded(self):
+        return [entry for entry in self.entries if entry.ok]
+
+    @property
+    def failed(self):
+        return [entry for entry in self.entries if not entry.ok]
+
+    @property
+    def values(self):
+        ''' values of the items which succeeded '''
+        return [entry.value for entry in self.entries if entry.ok]
+
+    @property
+    def ok(self):
+        return all(entry.ok for entry in self.entries)
+
+    def raise_for_errors(self):
+        failed = self.failed
+        if failed:
+            raise error.BulkFailed(
+                f'{len(failed)} of {len(self.entries)} items failed, '
+                f'first: {failed[0].error!r}',
+                failed,
+            )
+        return self
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        failed = len(self.failed)
+        succeeded = len(self.entries) - failed
+        return f'<BulkResult, succeeded: {succeeded}, failed: {failed}>'
+
+    __repr__ = __str__
+
+
+def call(func, entry):
+    try:
+        entry.value = func(entry.item)
+    except Exception as e:
+        logger.debug(f'bulk item {entry.index} failed, {e!r}')
+        entry.error = e
+
+
+def run(func, items, workers) -> BulkResult:
+    '''Call func with every item on a pool of workers threads
+
+    requests of the items go through the same session, rate limiter and
+    renewal as any other
+    '''
+    entries = [BulkItem(idx, item) for idx, item in enumerate(items)]
+    if entries:
+        with ThreadPoolExecutor(min(workers, len(entries))) as pool:
+            for entry in entries:
+                pool.submit(call, func, entry)
+    return BulkResult(entries)
+
+
+async def run_async(func, items, workers) -> BulkResult:
+    ''' run, awaiting func with at most workers items at once '''
+    entries = [BulkItem(idx, item) for idx, item in enumerate(items)]
+    semaphore = asyncio.Semaphore(workers)
+
+    async def call_async(entry):
+        async with semaphore:
+            try:
+                entry.value = await func(entry.item)
+            except Exception as e:
+                logger.debug(f'bulk item {entry.index} failed, {e!r}')
+                entry.error = e
+
+    await asyncio.gather(*(call_async(entry) for entry in entries))
+    return BulkResult(entries)
@@ -0,0 +1,148 @@
+from collections import defaultdict
+from threading import Lock
+from time import time
+
+from ..backend import MISSING, BaseBackend, TTLCacheBackend
+
+
+class ModelCache:
+    '''Read-through cache of the documents behind BaseModel.get
+
+    a document is stored by (TYPE, pk, includes) and served instead of a
+    request while it is fresh, only models with a ttl are cached; create,
+    update and delete of a client using the cache invalidate every stored
+    document holding the resources they touch, as data, included resource
+    or relationship linkage; with a RedisBackend shared by several
+    processes, the documents this process stored or was served are
+    invalidated, as is the document of a written resource fetched without
+    includes, other documents stored elsewhere are left to expire
+
+    :backend: where documents are stored, RedisBackend shares them across
+              processes, defaults to a TTLCacheBackend keeping them one hour
+    :namespace: prefix of the backend keys, keeps apart accounts sharing it
+    :ttl: seconds a document is fresh if its TYPE is not in ttls, 0 to
+          cache only the models in ttls
+    :ttls: seconds a document is fresh per model TYPE, e.g.
+           {'bundleIds': 3600, 'certificates': 600}
+    '''
+
+    TTL = 0
+    KEEP = 3600
+
+    def __init__(
+        self,
+        backend: BaseBackend = None,
+        namespace: str = '',
+        ttl: int = None,
+        ttls: dict = None,
+    ):
+        self.backend = backend or TTLCacheBackend(ttl=self.KEEP * 1000)
+        self.namespace = namespace
+        self.ttl = self.TTL if ttl is None else ttl
+        self.ttls = ttls or {}
+
+        # backend keys of the stored documents holding a (type, id)
+        self.keys = defaultdict(set)
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self.invalidated = 0
+        self.lock = Lock()
+
+    @property
+    def stats(self):
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        types = {}
+        for type_ in self.hits.keys() | self.misses.keys():
+            total = self.hits[type_] + self.misses[type_]
+            types[type_] = {
+                'hits': self.hits[type_],
+                'misses': self.misses[type_],
+                'hit_ratio': self.hits[type_] / total,
+            }
+        return {
+            'hits': hits,
+            'misses': misses,
+            'invalidated': self.invalidated,
+            'hit_ratio': hits / (hits + misses) if hits + misses else 0,
+            'types': types,
+        }
+
+    def get_ttl(self, model):
+        return self.ttls.get(model.TYPE, self.ttl)
+
+    def get_key(self, model, pk, includes):
+        return self.format_key(model.TYPE, pk, includes)
+
+    def format_key(self, type_, pk, includes=()):
+        includes = ','.join(sorted(includes))
+        return f'model_{self.namespace}_{type_}_{pk}_{includes}'
+
+    def get(self, model, pk, includes=()):
+        ''' fresh document of the model pk, None if it is not stored '''
+        if not self.get_ttl(model):
+            return None
+        key = self.get_key(model, pk, includes)
+        entry = self.backend.get(key)
+        if isinstance(entry, (str, bytes)):
+            entry = self.backend.codec.loads(entry)
+        with self.lock:
+            if entry is MISSING or time() >= entry['expires_at']:
+                self.misses[model.TYPE] += 1
+                return None
+            self.hits[model.TYPE] += 1
+            # maybe stored by another process, writes of this one drop it
+            self.index(key, entry['document'])
+        return entry['document']
+
+    def save(self, model, pk, includes, document):
+        ttl = self.get_ttl(model)
+        if not ttl:
+            return
+        key = self.get_key(model, pk, includes)
+        entry = {'expires_at': time() + ttl, 'document': document}
+        self.backend.save(key, self.backend.codec.dumps(entry), ttl * 1000)
+        with self.lock:
+            self.index(key, document)
+
+    def index(self, key, document):
+        for resource in self.iter_resources(document):
+            self.keys[resource].add(key)
+
+    @staticmethod
+    def iter_resources(document):
+        ''' (type, id) of the resources a document holds or links to '''
+        data = document.get('data')
+        for resource in [data, *document.get('included', [])]:
+            if not isinstance(resource, dict):
+                continue
+            # a resource being created has no id yet, only its links
+            if 'id' in resource:
+                yield resource['type'], resource['id']
+            for relationship in resource.get('relationships', {}).values():
+                linkage = relationship.get('data') or []
+                for ele in linkage if isinstance(linkage, list) else [linkage]:
+                    yield ele['type'], ele['id']
+
+    def invalidate(self, resource):
+        '''Drop the documents holding resource or the resources it links to
+
+        :resource: resource object, as sent or received, or its linkage
+        '''
+        with self.lock:
+            keys = set()
+            for ele in self.iter_resources({'data': resource}):
+                keys.update(self.keys.pop(ele, ()))
+            self.invalidated += len(keys)
+            if 'id' in resource:
+                # stored by any process sharing the backend
+                keys.add(self.format_key(resource['type'], resource['id']))
+        # an expired entry replaces the document, in a shared backend too
+        tombstone = self.backend.codec.dumps({'expires_at': 0})
+        for key in keys:
+            self.backend.save(key, tombstone, self.KEEP * 1000)
+
+    def reset(self):
+        with self.lock:
+            self.hits.clear()
+            self.misses.clear()
+            self.invalidated = 0
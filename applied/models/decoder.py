@@ -0,0 +1,74 @@
+from dataclasses import MISSING
+
+
+class Decoder:
+    '''Maps JSON:API attributes to the fields of a model
+
+    compiled once per model class from its dataclass fields, instead of
+    walking them on every call; attributes holding every init field under
+    its source name, which is what the api sends, are mapped by a generated
+    function in a single dict display, anything else by the general loop
+    '''
+
+    def __init__(self, model):
+        self.model = model
+        # (name, source, factory of the value when missing, None to skip)
+        self.fields = [
+            (name, field.metadata.get('source', name), self.get_missing(field))
+            for name, field in model.__dataclass_fields__.items()
+            if name != 'id'
+        ]
+        self.decode_complete = self.compile()
+
+    @staticmethod
+    def get_missing(field):
+        if not field.init:
+            return None
+        if field.default_factory is not MISSING:
+            return field.default_factory
+        if field.default is not MISSING:
+            default = field.default
+            return lambda: default
+        return field.type
+
+    def compile(self):
+        lines = ['def decode_complete(attributes):', '    try:']
+        lines.append('        values = {')
+        for name, source, missing in self.fields:
+            if missing is not None:
+                lines.append(f'            {name!r}: attributes[{source!r}],')
+        lines.extend(['        }', '    except KeyError:', '        return'])
+        # not init fields are optional
+        for name, source, missing in self.fields:
+            if missing is None:
+                lines.extend(
+                    [
+                        f'    if {source!r} in attributes:',
+                        f'        values[{name!r}] = attributes[{source!r}]',
+                        f'    elif {name!r} in attributes:',
+                        f'        values[{name!r}] = attributes[{name!r}]',
+                    ]
+                )
+        lines.append('    return values')
+        namespace = {}
+        exec('\n'.join(lines), namespace)
+        return namespace['decode_complete']
+
+    def decode(self, attributes, fill_missing=True):
+        '''Constructor kwargs(or attributes to set) found in attributes
+
+        :fill_missing: give missing init fields their default
+        '''
+        if fill_missing:
+            values = self.decode_complete(attributes)
+            if values is not None:
+                return values
+        values = {}
+        for name, source, missing in self.fields:
+            if source in attributes:
+                values[name] = attributes[source]
+            elif name in attributes:
+                values[name] = attributes[name]
+            elif fill_missing and missing is not None:
+                values[name] = missing()
+        return values
@@ -0,0 +1,81 @@
+import re
+from json import JSONDecoder
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+decoder = JSONDecoder()
+# builds no dicts, used to step over values which are decoded later
+skipper = JSONDecoder(object_pairs_hook=lambda pairs: None)
+
+
+class Document:
+    '''JSON:API document decoded member by member
+
+    the top level members other than `data`(included, links, meta) are
+    decoded when the document is created, `data` items are decoded one at a
+    time by iter_data, so a page never exists as a whole in python objects
+
+    finding the members after `data` means stepping over it first, which
+    costs a second, cheaper, decoding pass over the items
+    '''
+
+    def __init__(self, text: str):
+        self.text = text
+        self.members = {}
+        self.data_at = None
+        self.scan()
+
+    def skip_ws(self, idx):
+        return WHITESPACE.match(self.text, idx).end()
+
+    def expect(self, idx, char):
+        idx = self.skip_ws(idx)
+        if self.text[idx : idx + 1] != char:
+            raise ValueError(f'expecting {char!r} at char {idx}')
+        return self.skip_ws(idx + 1)
+
+    def next_item(self, idx, end_char):
+        ''' position of the next item, None if the container ends '''
+        idx = self.skip_ws(idx)
+        char = self.text[idx : idx + 1]
+        if char == ',':
+            return self.skip_ws(idx + 1)
+        if char == end_char:
+            return None
+        raise ValueError(f'expecting , or {end_char!r} at char {idx}')
+
+    def scan(self):
+        text = self.text
+        idx = self.expect(0, '{')
+        if text[idx : idx + 1] == '}':
+            return
+        while idx is not None:
+            key, idx = decoder.raw_decode(text, idx)
+            idx = self.expect(idx, ':')
+            if key == 'data':
+                self.data_at = idx
+                _, idx = skipper.raw_decode(text, idx)
+            else:
+                self.members[key], idx = decoder.raw_decode(text, idx)
+            idx = self.next_item(idx, '}')
+
+    def iter_data(self):
+        ''' yields decoded data items, a single resource is yielded as is '''
+        if self.data_at is None:
+            return
+        text = self.text
+        idx = self.data_at
+        if text[idx] != '[':
+            yield decoder.raw_decode(text, idx)[0]
+            return
+        idx = self.skip_ws(idx + 1)
+        if text[idx : idx + 1] == ']':
+            return
+        while idx is not None:
+            item, idx = decoder.raw_decode(text, idx)
+            yield item
+            idx = self.next_item(idx, ']')
+
+    @property
+    def is_list(self):
+        return self.data_at is not None and self.text[self.data_at] == '['
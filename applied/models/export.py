@@ -0,0 +1,158 @@
+'''Columnar export of query results, read from the pages as they come
+
+    result = client.Device.find(limit=200)
+    result.to_columns(['udid', 'status'])   # {'udid': [...], 'status': [...]}
+    result.to_numpy()                       # structured array, needs numpy
+    result.to_arrow()                       # pyarrow.Table, needs pyarrow
+    with open('devices.csv', 'w', newline='') as f:
+        result.write_csv(f)
+'''
+import csv
+from dataclasses import fields as get_fields
+
+from applied import error
+from applied.codec import get_codec
+
+from .document import Document
+
+SCALARS = (str, int, float, bool)
+
+
+class Exporter:
+    '''Reads fields of a model as columns, from page data or built models
+
+    attributes are read from the resources of a page as they are, no model
+    is built for them; relationships are not exported, neither are fields
+    the model computes itself, such as Profile.distribution_type
+
+    :fields: names of the exported fields, every field if None
+    '''
+
+    def __init__(self, model, fields=None):
+        self.model = model
+        # (name, source) of the exported fields
+        self.columns = self.get_columns(model, fields)
+        self.names = [name for name, _ in self.columns]
+
+    @staticmethod
+    def get_columns(model, names=None):
+        exported = {}
+        for field in get_fields(model):
+            source = field.metadata.get('source', field.name)
+            if source in model.INCLUDE_FIELDS:
+                continue
+            if not field.init and 'source' not in field.metadata:
+                continue
+            exported[field.name] = (field.name, source)
+        if names is None:
+            return list(exported.values())
+        unknown = set(names) - exported.keys()
+        if unknown:
+            raise error.UnknownModelField(list(exported), unknown)
+        return [exported[name] for name in names]
+
+    def read_page(self, data):
+        ''' columns of the resources of a page, a dict or a Document '''
+        if isinstance(data, Document):
+            items = list(data.iter_data())
+        else:
+            items = data['data']
+        attributes = [item.get('attributes') or {} for item in items]
+        columns = {}
+        for name, source in self.columns:
+            if name == 'id':
+                columns[name] = [item['id'] for item in items]
+            else:
+                columns[name] = [ele.get(source) for ele in attributes]
+        return columns
+
+    def read_models(self, models):
+        return {
+            name: [getattr(model, name) for model in models]
+            for name in self.names
+        }
+
+
+def join_columns(names, pages):
+    ''' columns of pages, as yielded by Result.iter_columns, joined '''
+    columns = {name: [] for name in names}
+    for page in pages:
+        for name, values in page.items():
+            columns[name].extend(values)
+    return columns
+
+
+def to_numpy(columns):
+    '''Structured array of columns, a field per column
+
+    columns holding a single kind of str, int, float or bool get the dtype
+    numpy infers for them, the others are kept as objects
+    '''
+    try:
+        import numpy
+    except ImportError:
+        raise error.MissingDependency('numpy is not installed')
+
+    arrays = []
+    for values in columns.values():
+        kinds = {type(ele) for ele in values}
+        if len(kinds) == 1 and kinds.pop() in SCALARS:
+            arrays.append(numpy.array(values))
+            continue
+        # filled one by one, numpy would make lists of values a dimension
+        array = numpy.empty(len(values), dtype=object)
+        for idx, value in enumerate(values):
+            array[idx] = value
+        arrays.append(array)
+    return numpy.rec.fromarrays(arrays, names=list(columns))
+
+
+def to_arrow(columns):
+    ''' pyarrow.Table of columns, with the types pyarrow infers '''
+    try:
+        import pyarrow
+    except ImportError:
+        raise error.MissingDependency('pyarrow is not installed')
+    return pyarrow.table(columns)
+
+
+def write_csv(file, names, pages) -> int:
+    '''Writes a header row then a row per resource of pages, returns the
+    number of rows written
+
+    None is written as an empty cell, values other than str, int, float or
+    bool as json
+    '''
+    dumps = get_codec().dumps
+    writer = csv.writer(file)
+    writer.writerow(names)
+    count = 0
+    for page in pages:
+        for row in zip(*page.values()):
+            writer.writerow(
+                [
+                    ele
+                    if ele is None or isinstance(ele, SCALARS)
+                    else to_text(dumps(ele))
+                    for ele in row
+                ]
+            )
+            count += 1
+    return count
+
+
+def write_ndjson(file, names, pages) -> int:
+    ''' writes a json object per resource of pages, returns their number '''
+    dumps = get_codec().dumps
+    count = 0
+    for page in pages:
+        for row in zip(*page.values()):
+            file.write(to_text(dumps(dict(zip(names, row)))))
+            file.write('\n')
+            count += 1
+    return count
+
+
+def to_text(data):
+    # orjson dumps bytes
+    return data.decode() if isinstance(data, bytes) else data
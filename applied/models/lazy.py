@@ -0,0 +1,266 @@
+from dataclasses import MISSING, fields
+from types import MemberDescriptorType
+
+from .decoder import Decoder
+from .queryset import Query, Result
+
+
+def get_slot(cls, name):
+    ''' slot of a field of a compact model, in a base class of cls '''
+    for klass in cls.__mro__:
+        attr = klass.__dict__.get(name)
+        if isinstance(attr, MemberDescriptorType):
+            return attr
+
+
+def get_missing(field):
+    ''' factory of the value of a field the attributes lack, or None '''
+    if field.init:
+        return Decoder.get_missing(field)
+    if field.default_factory is not MISSING:
+        return field.default_factory
+    if field.default is not MISSING:
+        default = field.default
+        return lambda: default
+
+
+class Related:
+    '''Relationship of a model as found in its document, resolved when read
+
+    keeps the linkage(None if the document has none) and the related link of
+    the relationship, with the included index and identities of the document
+    to build the related models from
+    '''
+
+    __slots__ = ('data', 'url', 'included', 'identities')
+
+    def __init__(self, data, url, included, identities):
+        self.data = data
+        self.url = url
+        self.included = included
+        self.identities = identities
+
+    def resolve(self, ins, many):
+        ''' related models of ins, fetching what the document lacks '''
+        if self.data is None:
+            return self.fetch(ins, many)
+        linkages = self.data if isinstance(self.data, list) else [self.data]
+        found = {}
+        for linkage in linkages:
+            key = (linkage['type'], linkage['id'])
+            found[key] = ins.map_included(
+                linkage, self.included, self.identities
+            )
+        if self.url and None in found.values():
+            fetched = self.fetch(ins, many)
+            for model in fetched if many else [fetched]:
+                if model is None:
+                    continue
+                key = (model.TYPE, model.id)
+                if found.get(key, model) is None:
+                    found[key] = model
+        models = [found[(ele['type'], ele['id'])] for ele in linkages]
+        return models if isinstance(self.data, list) else models[0]
+
+    def fetch(self, ins, many):
+        ''' all the related models, through the related endpoint '''
+        if not self.url:
+            return [] if many else None
+        session = ins.client.api_session
+        params = {'limit': Query.MAX_LIMIT} if many else None
+        json_data = session.load_json(session.get(self.url, params=params))
+        data = json_data.get('data')
+        if not data:
+            return [] if many else None
+        if isinstance(data, dict):
+            return ins.from_json(json_data)
+        model = ins.client.MODEL_CLASSES.get(data[0]['type'], type(ins))
+        # pages through links.next, MAX_LIMIT models per request
+        return list(Result(model, params, json_data))
+
+    def __repr__(self):
+        if self.data is None:
+            return f'<Related {self.url}>'
+        if isinstance(self.data, list):
+            return f'<Related {len(self.data)} {self.url}>'
+        return f'<Related {self.data["type"]} {self.data["id"]}>'
+
+
+class LazyRelationship:
+    '''Data descriptor of a relationship field, resolving a Related on read
+
+    the value is kept where the field would keep it, the instance __dict__
+    or the slot of a compact model
+    '''
+
+    def __init__(self, field, slot=None):
+        self.name = field.name
+        self.many = field.default_factory is not MISSING
+        self.default = field.default
+        self.slot = slot
+
+    def peek(self, ins):
+        ''' stored value, a Related if not resolved yet '''
+        if self.slot is not None:
+            return self.slot.__get__(ins, type(ins))
+        try:
+            return ins.__dict__[self.name]
+        except KeyError:
+            # dataclass __init__ leaves plain defaults to the class
+            if self.default is MISSING:
+                raise AttributeError(self.name)
+            return self.default
+
+    def __get__(self, ins, owner):
+        if ins is None:
+            return self
+        value = self.peek(ins)
+        if isinstance(value, Related):
+            value = value.resolve(ins, self.many)
+            self.__set__(ins, value)
+        return value
+
+    def __set__(self, ins, value):
+        if self.slot is not None:
+            self.slot.__set__(ins, value)
+        else:
+            ins.__dict__[self.name] = value
+
+
+class LazyModel:
+    '''Mixin keeping the relationships of a model unresolved until read
+
+    relationships found in the included resources are built on first
+    access, the others are fetched through their related endpoint then;
+    until resolved, a relationship keeps the included resources of its
+    document alive
+    '''
+
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        decoder = cls.get_decoder()
+        sources = {name: source for name, source, _ in decoder.fields}
+        lazy = set()
+        for field in fields(cls):
+            source = sources.get(field.name)
+            if source not in cls.INCLUDE_FIELDS:
+                continue
+            slot = get_slot(cls, field.name)
+            setattr(cls, field.name, LazyRelationship(field, slot))
+            lazy.add(source)
+        cls.LAZY_RELATIONSHIPS = frozenset(lazy)
+
+    def __repr__(self):
+        ''' dataclass repr, without resolving relationships '''
+        values = []
+        for field in fields(self):
+            if field.repr:
+                values.append(f'{field.name}={self.peek(field.name)!r}')
+        return f'{type(self).__name__}({", ".join(values)})'
+
+
+class LazyAttribute:
+    '''Descriptor of an attribute field, decoding it from the raw attributes
+    of the model when first read
+
+    not a data descriptor, the decoded value is kept in the instance
+    __dict__, which then takes precedence over the descriptor
+    '''
+
+    def __init__(self, field, source):
+        self.name = field.name
+        self.source = source
+        self.missing = get_missing(field)
+
+    def __get__(self, ins, owner):
+        if ins is None:
+            return self
+        value = self.decode(ins)
+        # lands in the instance __dict__, no data descriptor in the way
+        setattr(ins, self.name, value)
+        return value
+
+    def decode(self, ins):
+        attributes = ins.raw_attributes
+        if self.source in attributes:
+            return attributes[self.source]
+        if self.name in attributes:
+            return attributes[self.name]
+        if self.missing is None:
+            raise AttributeError(self.name)
+        return self.missing()
+
+
+class LazySlotAttribute(LazyAttribute):
+    ''' LazyAttribute of a compact model, keeping the value in its slot '''
+
+    def __init__(self, field, source, slot):
+        super().__init__(field, source)
+        self.slot = slot
+
+    def __get__(self, ins, owner):
+        if ins is None:
+            return self
+        try:
+            return self.slot.__get__(ins, owner)
+        except AttributeError:
+            value = self.decode(ins)
+        self.slot.__set__(ins, value)
+        return value
+
+    def __set__(self, ins, value):
+        self.slot.__set__(ins, value)
+
+
+class LazyAttributes:
+    '''Mixin building models without decoding their attributes
+
+    a model keeps the attributes of its resource as they were loaded and
+    decodes a field when it is first read, as_dict decodes them all; the
+    attributes stay referenced by the model, large ones included, for as
+    long as the model lives
+    '''
+
+    __slots__ = ()
+
+    # slots of the delegated class, see delegate
+    INSTANCE_SLOTS = ('raw_attributes',)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        decoder = cls.get_decoder()
+        sources = {name: source for name, source, _ in decoder.fields}
+        # relationships are set by build, attributes decoded by descriptors
+        relationships = []
+        for field in fields(cls):
+            if field.name == 'id':
+                continue
+            source = sources[field.name]
+            if source in cls.INCLUDE_FIELDS:
+                missing = get_missing(field)
+                if missing is not None:
+                    relationships.append((field.name, missing))
+                continue
+            slot = get_slot(cls, field.name)
+            if slot is None:
+                setattr(cls, field.name, LazyAttribute(field, source))
+            else:
+                setattr(
+                    cls, field.name, LazySlotAttribute(field, source, slot)
+                )
+        cls.RELATIONSHIP_DEFAULTS = tuple(relationships)
+
+    @classmethod
+    def build(cls, rid, attributes):
+        ''' model of the resource rid, its attributes left undecoded '''
+        ins = cls.__new__(cls)
+        ins.id = rid
+        ins.raw_attributes = attributes
+        for name, missing in cls.RELATIONSHIP_DEFAULTS:
+            setattr(ins, name, missing())
+        post_init = getattr(ins, '__post_init__', None)
+        if post_init is not None:
+            post_init()
+        return ins
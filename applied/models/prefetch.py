@@ -0,0 +1,110 @@
+import asyncio
+from queue import Full, Queue
+from threading import Event, Thread
+
+# put in the queue once the last page is fetched
+END = object()
+
+
+class Prefetcher:
+    '''Iterator of the pages following a link, fetched on a background thread
+
+    pages are fetched one after another, as each one holds the link to the
+    next, and at most `ahead` fetched pages wait for the consumer, which
+    bounds memory; an error is raised by the iterator in place of the page
+    which failed, close stops the thread once its current request is done
+
+    `url` is the url of the page the iterator returns next, None once the
+    last one is returned, a consumer whose next link moved on, e.g. loaded
+    by another iterator, checks it before using the pages of the prefetcher
+
+    :fetch: callable(url) returning the page at url and the url of the next
+            one, None after the last page
+    '''
+
+    # seconds between checks for close while the queue is full
+    POLL = 0.1
+
+    def __init__(self, fetch, url, ahead):
+        self.fetch = fetch
+        self.url = url
+        self.queue = Queue(maxsize=ahead)
+        self.stopped = Event()
+        self.thread = Thread(
+            target=self.run, args=(url,), name='prefetch', daemon=True
+        )
+        self.thread.start()
+
+    def run(self, url):
+        while url is not None and not self.stopped.is_set():
+            try:
+                data, url = self.fetch(url)
+            except Exception as e:
+                self.put((None, None, e))
+                return
+            self.put((data, url, None))
+        self.put((END, None, None))
+
+    def put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=self.POLL)
+                return
+            except Full:
+                continue
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.stopped.is_set():
+            raise StopIteration
+        data, url, error = self.queue.get()
+        if error is not None:
+            self.close()
+            raise error
+        if data is END:
+            self.close()
+            raise StopIteration
+        self.url = url
+        return data
+
+    def close(self):
+        self.stopped.set()
+
+
+class AsyncPrefetcher:
+    ''' Prefetcher fetching on a task of the running event loop '''
+
+    def __init__(self, fetch, url, ahead):
+        self.fetch = fetch
+        self.url = url
+        self.queue = asyncio.Queue(maxsize=ahead)
+        self.task = asyncio.ensure_future(self.run(url))
+
+    async def run(self, url):
+        while url is not None:
+            try:
+                data, url = await self.fetch(url)
+            except Exception as e:
+                await self.queue.put((None, None, e))
+                return
+            await self.queue.put((data, url, None))
+        await self.queue.put((END, None, None))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.task.cancelled():
+            raise StopAsyncIteration
+        data, url, error = await self.queue.get()
+        if error is not None:
+            raise error
+        if data is END:
+            raise StopAsyncIteration
+        self.url = url
+        return data
+
+    async def aclose(self):
+        self.task.cancel()
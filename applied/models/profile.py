@@ -148,14 +148,20 @@ class Profile(BaseModel):
         so we need to use portal session explicitly
         '''
         data = self.build_update_data(name, app_id, certificates, devices)
-        resp = self.client.portal_session.post(
-            f'{self.client.portal_session.DEV_QH65B2}/account/ios/profile'
+        portal = self.client.portal_session
+        resp = portal.post(
+            f'{portal.DEV_QH65B2}/account/ios/profile'
             '/regenProvisioningProfile.action',
             data=data,
             headers=self.fetch_csrf_data(),
         )
-        # construct new instance
-        json = resp.json()['provisioningProfile']
+        self.invalidate_cached({'type': self.TYPE, 'id': self.id})
+        return self.from_provisioning_profile(
+            portal.load_json(resp)['provisioningProfile']
+        )
+
+    def from_provisioning_profile(self, json: dict) -> 'Profile':
+        ''' construct new instance from portal provisioningProfile data '''
         data = {
             'id': json['provisioningProfileId'],
             'type': self.TYPE,
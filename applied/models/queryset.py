@@ -1,7 +1,13 @@
 from collections import defaultdict
+from copy import deepcopy
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 from applied import error, logger
 
+from . import export
+from .document import Document
+from .prefetch import Prefetcher
+
 
 class Query:
 
@@ -101,7 +107,7 @@ class Query:
         if self.sorts:
             params['sort'] = ','.join(self.sorts)
         for name, values in self.related_limits.items():
-            params[f'limit[{name}]'] = ','.join(values)
+            params[f'limit[{name}]'] = str(values)
 
         logger.debug(
             f'get_params, filters: {self.filters}, fields: {self.fields}, '
@@ -114,18 +120,103 @@ class Query:
 
 
 class Result:
-    ''' query result helper container '''
+    '''query result helper container
+
+    models of a page are built when first needed, with `incremental`, pages
+    are decoded as a Document and models are built one by one while being
+    iterated, instead of decoding the whole page and building all its models
+    up front
+
+    with `prefetch`, iterating fetches up to that many following pages
+    ahead on a background thread while the models of the current page are
+    consumed, see Prefetcher
+
+    `objects` holds the models built so far, reading it builds those of a
+    loaded page that is not incremental, as `find` used to do up front
 
-    def __init__(self, model, params, data):
+    iterating keeps every model in `objects`, stream and iter_pages yield
+    them without keeping the pages they consume, and pages can be exported
+    as columns without building their models, see iter_columns
+    '''
+
+    def __init__(self, model, params, data, incremental=False, prefetch=0):
         self.model = model
         self.params = params
-        self.objects = []
+        self.incremental = incremental
+        self.prefetch = prefetch
+        self.built = []
+        # data of the loaded page while its models are not built
+        self.page = None
+        self.pending = iter(())
         self.load_objects(data)
 
+    @property
+    def objects(self) -> list:
+        page = self.page
+        if page is not None and not isinstance(page, Document):
+            self.page = None
+            self.built.extend(self.model.from_json(page))
+        return self.built
+
+    @objects.setter
+    def objects(self, objects):
+        self.built = objects
+
+    def decode(self, resp):
+        if self.incremental:
+            return Document(resp.text)
+        return self.model.client.api_session.load_json(resp)
+
+    def fetch_page(self, url):
+        ''' decoded page at url and the url of the page after it '''
+        data = self.decode(self.model.client.api_session.get(url))
+        if isinstance(data, Document):
+            links = data.members['links']
+        else:
+            links = data['links']
+        return data, links.get('next')
+
+    def iter_fetched(self, url):
+        while url is not None:
+            data, url = self.fetch_page(url)
+            yield data
+
+    def follow(self, url):
+        '''iterator of the decoded pages from url on, through their next
+        links, with prefetch the pages are fetched ahead from now on
+        '''
+        if self.prefetch:
+            return Prefetcher(self.fetch_page, url, self.prefetch)
+        return self.iter_fetched(url)
+
+    def track_page(self):
+        session = self.model.client.api_session
+        if session is not None and session.hooks is not None:
+            session.hooks.on_page(self.model.TYPE)
+
     def load_objects(self, data):
-        self.links = data['links']
-        self.meta = data.get('meta', {})
-        self.objects.extend(self.model.from_json(data))
+        self.track_page()
+        if isinstance(data, Document):
+            self.links = data.members['links']
+            self.meta = data.members.get('meta', {})
+        else:
+            self.links = data['links']
+            self.meta = data.get('meta', {})
+        self.page = data
+
+    def load_pending(self):
+        ''' build the next models of the loaded page, False if none '''
+        page = self.page
+        if page is not None:
+            self.page = None
+            if not isinstance(page, Document):
+                self.built.extend(self.model.from_json(page))
+                return True
+            self.pending = self.model.iter_document(page)
+        for obj in self.pending:
+            self.built.append(obj)
+            return True
+        return False
 
     @property
     def count(self):
@@ -134,6 +225,8 @@ class Result:
         return 0
 
     def first(self):
+        if not self.objects:
+            self.load_pending()
         try:
             return self.objects[0]
         except IndexError:
@@ -145,27 +238,137 @@ class Result:
             raise error.MultipleResultsFound(self.params, count)
         if count == 0:
             raise error.NoResultFound(self.params)
-        return self.objects[0]
+        return self.first()
 
     def rewind(self):
         if 'first' in self.links:
             self.objects = []
             resp = self.model.client.api_session.get(self.links['first'])
-            self.load_objects(resp.json())
+            self.load_objects(self.decode(resp))
         return self
 
     def __iter__(self):
         pos = 0
-        while 1:
-            while pos < len(self.objects):
-                yield self.objects[pos]
-                pos += 1
-
-            if 'next' not in self.links:
-                return
+        # pages prefetched from the next link, while it is still the one of
+        # the result, iterators sharing the result move it on
+        pages = None
+        try:
+            while 1:
+                while pos < len(self.objects) or self.load_pending():
+                    yield self.objects[pos]
+                    pos += 1
+
+                if 'next' not in self.links:
+                    return
+                url = self.links['next']
+                if not self.prefetch:
+                    self.load_objects(self.fetch_page(url)[0])
+                    continue
+                if pages is None or pages.url != url:
+                    if pages is not None:
+                        pages.close()
+                    pages = Prefetcher(self.fetch_page, url, self.prefetch)
+                self.load_objects(next(pages))
+        finally:
+            if pages is not None:
+                pages.close()
+
+    def iter_columns(self, fields=None):
+        '''yields the fields of the models as columns, a dict of lists per
+        page, see export.Exporter
+
+        built models are read first, then the pages left, straight from
+        their data; pages fetched here are not kept by the result
+
+        :fields: names of the exported fields, every field if None
+        '''
+        return self.read_columns(export.Exporter(self.model, fields))
+
+    def read_columns(self, exporter):
+        for page in self.walk():
+            if isinstance(page, list):
+                yield exporter.read_models(page)
+            else:
+                yield exporter.read_page(page)
+
+    def walk(self):
+        '''yields the models the result has built as a list, then the data
+        of its loaded page if its models are not built, then the data of
+        each page left, fetched as needed and not kept
+        '''
+        if self.page is None:
+            # the models of the loaded page are built, or being built
+            while self.load_pending():
+                pass
+        if self.built:
+            yield self.built
+        if self.page is not None:
+            yield self.page
+        if 'next' not in self.links:
+            return
+        pages = self.follow(self.links['next'])
+        try:
+            for data in pages:
+                self.track_page()
+                yield data
+        finally:
+            pages.close()
+
+    def build_page(self, data) -> list:
+        if isinstance(data, Document):
+            return list(self.model.iter_document(data))
+        return self.model.from_json(data)
+
+    def iter_pages(self):
+        '''yields the models of every page as a list, without keeping them
+
+        memory holds a page or two(more with prefetch) whatever the number
+        of pages, the models the result has already built come first as
+        one list, and first/one keep working on the result as loaded
+        '''
+        for page in self.walk():
+            if isinstance(page, list):
+                yield list(page)
+            else:
+                yield self.build_page(page)
+
+    def stream(self):
+        ''' yields the models of every page, without keeping them '''
+        for page in self.walk():
+            if isinstance(page, list):
+                yield from list(page)
+            elif isinstance(page, Document):
+                # built one by one, as incremental iteration does
+                yield from self.model.iter_document(page)
+            else:
+                yield from self.model.from_json(page)
+
+    def to_columns(self, fields=None) -> dict:
+        ''' fields of all the models, a list of values by field name '''
+        exporter = export.Exporter(self.model, fields)
+        return export.join_columns(exporter.names, self.read_columns(exporter))
+
+    def to_numpy(self, fields=None):
+        ''' structured array of all the models, see export.to_numpy '''
+        return export.to_numpy(self.to_columns(fields))
+
+    def to_arrow(self, fields=None):
+        ''' pyarrow.Table of all the models '''
+        return export.to_arrow(self.to_columns(fields))
+
+    def write_csv(self, file, fields=None) -> int:
+        ''' writes the models as csv, page by page, see export.write_csv '''
+        exporter = export.Exporter(self.model, fields)
+        return export.write_csv(
+            file, exporter.names, self.read_columns(exporter)
+        )
 
-            resp = self.model.client.api_session.get(self.links['next'])
-            self.load_objects(resp.json())
+    def write_ndjson(self, file, fields=None) -> int:
+        ''' writes the models as json lines, page by page '''
+        exporter = export.Exporter(self.model, fields)
+        return export.write_ndjson(
+            file, exporter.names, self.read_columns(exporter)
+        )
 
     def __str__(self):
         return f'<{self.model.__name__}, total: {self.count}>'
@@ -174,3 +377,229 @@ class Result:
 
     def __bool__(self):
         return self.count > 0
+
+
+def with_limit(url, limit):
+    ''' url with its limit param replaced '''
+    parts = urlsplit(url)
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key != 'limit'
+    ]
+    query.append(('limit', str(limit)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class QuerySet:
+    '''Lazy, chainable query of a model, sent once evaluated, e.g.:
+        client.Device.objects.filter(status='ENABLED').order_by('name')[:50]
+
+    chaining returns a new QuerySet and sends nothing, iterating, len,
+    indexing, first, exists and count send the requests; params are
+    compiled and validated once per QuerySet, a slice asks the server for no
+    more models than it ends at, and the models of an iterated QuerySet are
+    kept for later iterations, iterator streams them instead
+
+    values and values_list make it yield rows of fields instead of models,
+    read from the resources as they are and asked for alone by fields[TYPE]
+    '''
+
+    def __init__(self, model, query=None, start=0, stop=None):
+        self.model = model
+        self.query = query or Query(limit=Query.MAX_LIMIT)
+        self.start = start
+        self.stop = stop
+        self.compiled = None
+        self.objects = None
+        # reads the rows of values and values_list, as dict, tuple or flat
+        self.exporter = None
+        self.shape = None
+
+    def clone(self):
+        qs = type(self)(
+            self.model, deepcopy(self.query), self.start, self.stop
+        )
+        qs.exporter, qs.shape = self.exporter, self.shape
+        return qs
+
+    def filter(self, **filters):
+        qs = self.clone()
+        qs.query.filter(**filters)
+        return qs
+
+    def only(self, **fields):
+        qs = self.clone()
+        qs.query.only(**fields)
+        return qs
+
+    def include(self, *includes):
+        qs = self.clone()
+        qs.query.include(*includes)
+        return qs
+
+    def order_by(self, *sorts):
+        qs = self.clone()
+        qs.query.sort(*sorts)
+        return qs
+
+    def limit_related(self, **limits):
+        qs = self.clone()
+        qs.query.limit_related(**limits)
+        return qs
+
+    def values(self, *names):
+        '''yields a dict of the named fields per model, see export.Exporter
+
+        :names: names of the fields, every attribute field and id if none
+        '''
+        qs = self.clone()
+        qs.exporter = export.Exporter(self.model, names or None)
+        qs.shape = 'dict'
+        return qs
+
+    def values_list(self, *names, flat=False):
+        '''values yielding tuples, or with flat the value of a single field
+
+        :names: names of the fields, every attribute field and id if none
+        '''
+        if flat and len(names) != 1:
+            raise ValueError('flat values_list takes a single field')
+        qs = self.clone()
+        qs.exporter = export.Exporter(self.model, names or None)
+        qs.shape = 'flat' if flat else 'tuple'
+        return qs
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise ValueError('slices of a QuerySet have no step')
+            start, stop = key.start or 0, key.stop
+            if start < 0 or (stop is not None and stop < 0):
+                raise ValueError('negative indexes are not supported')
+            qs = self.clone()
+            qs.start = self.start + start
+            if stop is not None:
+                stop = self.start + stop
+                qs.stop = stop if self.stop is None else min(stop, self.stop)
+            return qs
+        if key < 0:
+            raise ValueError('negative indexes are not supported')
+        return self.at(key)
+
+    @property
+    def is_empty(self):
+        return self.stop is not None and self.stop <= self.start
+
+    @property
+    def params(self) -> dict:
+        ''' request params, compiled once, a page holds the slice if it can '''
+        if self.compiled is None:
+            query = deepcopy(self.query)
+            if self.stop is not None:
+                query.limit(self.stop)
+            if self.exporter is not None:
+                sources = [
+                    source
+                    for name, source in self.exporter.columns
+                    if name != 'id'
+                ]
+                # id is always sent, there is nothing to ask for without
+                if sources:
+                    query.fields[self.model.TYPE] = sources
+            self.compiled = query.get_params(self.model)
+        return self.compiled
+
+    def next_url(self, url, seen):
+        ''' url of the next page, asking no more than the slice needs '''
+        if url is None or self.stop is None:
+            return url
+        return with_limit(url, min(self.stop - seen, Query.MAX_LIMIT))
+
+    def read_page(self, result, data) -> list:
+        ''' models of a page, or their rows with values or values_list '''
+        if self.exporter is None:
+            return result.build_page(data)
+        columns = self.exporter.read_page(data)
+        if self.shape == 'flat':
+            return columns[self.exporter.names[0]]
+        rows = zip(*columns.values())
+        if self.shape == 'dict':
+            return [dict(zip(self.exporter.names, row)) for row in rows]
+        return list(rows)
+
+    def iterator(self):
+        ''' yields the models or rows, fetched page by page and not kept '''
+        if self.is_empty:
+            return
+        result = self.model.fetch(self.params)
+        data, url = result.page, result.links.get('next')
+        seen = 0
+        while 1:
+            for obj in self.read_page(result, data):
+                if seen >= self.start:
+                    yield obj
+                seen += 1
+                if seen == self.stop:
+                    return
+            url = self.next_url(url, seen)
+            if url is None:
+                return
+            data, url = result.fetch_page(url)
+            result.track_page()
+
+    def evaluate(self) -> list:
+        if self.objects is None:
+            self.objects = list(self.iterator())
+        return self.objects
+
+    def __iter__(self):
+        return iter(self.evaluate())
+
+    def __len__(self):
+        return len(self.evaluate())
+
+    def at(self, index):
+        if self.objects is not None:
+            return self.objects[index]
+        for obj in self[index : index + 1].iterator():
+            return obj
+        raise IndexError(index)
+
+    def first(self):
+        if self.objects is not None:
+            return self.objects[0] if self.objects else None
+        for obj in self[:1].iterator():
+            return obj
+
+    def exists(self) -> bool:
+        if self.objects is not None:
+            return bool(self.objects)
+        for _ in self[:1].iterator():
+            return True
+        return False
+
+    def count(self) -> int:
+        ''' number of models matching, within the slice, in a single model
+        request '''
+        if self.objects is not None:
+            return len(self.objects)
+        if self.is_empty:
+            return 0
+        total = self.model.fetch({**self.params, 'limit': 1}).count
+        if self.stop is not None:
+            total = min(total, self.stop)
+        return max(total - self.start, 0)
+
+    def __repr__(self):
+        name = f'{type(self).__name__} {self.model.__name__}'
+        if self.start or self.stop is not None:
+            return f'<{name}[{self.start}:{self.stop}]>'
+        return f'<{name}>'
+
+
+class Objects:
+    ''' a new QuerySet of the model per access, e.g. client.Device.objects '''
+
+    def __get__(self, ins, owner):
+        return owner.QUERY_SET(owner)
@@ -0,0 +1,51 @@
+'''Decode and encode time of the available json codecs
+
+    python -m benchmarks.codec
+'''
+from timeit import repeat
+
+from applied.codec import codecs, get_codec
+from applied.error import UnknownCodec
+
+from .payloads import devices_document, profiles_document
+
+ROUNDS = 5
+
+
+def available_codecs():
+    for name in codecs:
+        try:
+            yield get_codec(name)
+        except UnknownCodec:
+            print(f'{name}: not installed, skipped')
+
+
+def best(func):
+    ''' seconds of a call, best of ROUNDS rounds of 10 calls '''
+    return min(repeat(func, number=10, repeat=ROUNDS)) / 10
+
+
+def main():
+    stdlib = get_codec('json')
+    payloads = {
+        'devices x200': stdlib.dumps(devices_document(200)),
+        'profiles x200 +included': stdlib.dumps(profiles_document(200)),
+    }
+    print(
+        f'{"payload":<26}{"codec":<8}{"size":>10}{"loads ms":>11}'
+        f'{"dumps ms":>11}'
+    )
+    for label, raw in payloads.items():
+        raw = raw.encode()
+        obj = stdlib.loads(raw)
+        for codec in available_codecs():
+            loads = best(lambda: codec.loads(raw))
+            dumps = best(lambda: codec.dumps(obj))
+            print(
+                f'{label:<26}{codec.name:<8}{len(raw):>10}'
+                f'{loads * 1000:>11.2f}{dumps * 1000:>11.2f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+'''Time and peak memory of model materialization and pagination
+
+    python -m benchmarks.models                 # 10k devices
+    python -m benchmarks.models --scale 100000  # 100k devices
+    python -m benchmarks.models --save          # store results as baselines
+    python -m benchmarks.models --check         # exit 1 on regressions
+
+profiles and bundle ids are generated at a tenth of the scale, results are
+compared to benchmarks/baselines.json, which is only meaningful for numbers
+saved on the same machine
+'''
+import argparse
+import io
+import json
+import sys
+import tracemalloc
+from os import path
+from time import perf_counter
+
+from applied.client import Client
+from applied.codec import get_codec
+from applied.models.base import index_included
+from applied.models.document import Document
+from applied.models.queryset import Result
+
+from .payloads import (
+    bundle_ids_document,
+    devices_document,
+    paginate,
+    profiles_document,
+)
+
+BASELINES = path.join(path.dirname(__file__), 'baselines.json')
+ROUNDS = 3
+# slower or bigger than the baseline by this ratio is a regression
+TOLERANCE = 1.25
+
+
+class Page:
+    def __init__(self, content):
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+
+class PagedSession:
+    ''' answers Result with encoded pages instead of the api '''
+
+    hooks = None
+
+    def __init__(self, pages):
+        self.codec = get_codec('json')
+        self.first = self.encode(pages[0])
+        self.pages = {
+            page['links']['next']: self.encode(following)
+            for page, following in zip(pages, pages[1:])
+        }
+
+    def encode(self, page):
+        return Page(self.codec.dumps(page).encode())
+
+    def get(self, url):
+        return self.pages[url]
+
+    def load_json(self, resp):
+        return self.codec.loads(resp.content)
+
+
+def operations(scale):
+    '''yields (name, func), building the inputs of each func up front'''
+    client = Client()
+    Device, Profile, BundleId = client.Device, client.Profile, client.BundleId
+    compact = Client(compact=True)
+    lazy = Client(lazy_attributes=True)
+
+    devices = devices_document(scale)
+    yield f'from_json devices x{scale}', lambda: Device.from_json(devices)
+    yield f'from_json devices x{scale} compact', lambda: (
+        compact.Device.from_json(devices)
+    )
+    yield f'from_json devices x{scale} lazy +2 reads', lambda: [
+        (device.udid, device.status)
+        for device in lazy.Device.from_json(devices)
+    ]
+    yield f'to_model devices x{scale}', lambda: [
+        Device.to_model(item, []) for item in devices['data']
+    ]
+    attributes = [item['attributes'] for item in devices['data']]
+    yield f'filter_attributes devices x{scale}', lambda: [
+        Device.filter_attributes(ele) for ele in attributes
+    ]
+
+    session = client.api_session = PagedSession(paginate(devices))
+
+    def iterate(incremental=False):
+        first = session.first
+        if incremental:
+            return list(Result(Device, {}, Document(first.text), True))
+        return list(Result(Device, {}, session.load_json(first)))
+
+    yield f'Result.__iter__ devices x{scale}', iterate
+    yield f'Result.__iter__ incremental devices x{scale}', lambda: iterate(
+        True
+    )
+
+    def stream(incremental=False):
+        first = session.first
+        if incremental:
+            result = Result(Device, {}, Document(first.text), True)
+        else:
+            result = Result(Device, {}, session.load_json(first))
+        for _ in result.stream():
+            pass
+
+    yield f'Result.stream devices x{scale}', stream
+    yield f'Result.stream incremental devices x{scale}', lambda: stream(True)
+
+    def export(write=None):
+        result = Result(Device, {}, session.load_json(session.first))
+        if write is None:
+            return result.to_columns()
+        return write(result, io.StringIO())
+
+    yield f'Result.to_columns devices x{scale}', export
+    yield f'Result.write_csv devices x{scale}', lambda: export(
+        Result.write_csv
+    )
+
+    rows = Device.objects.values_list('udid', 'status')
+
+    def project():
+        result = Result(Device, {}, session.load_json(session.first))
+        return [
+            row
+            for page in result.walk()
+            for row in rows.read_page(result, page)
+        ]
+
+    yield f'QuerySet.values_list devices x{scale}', project
+
+    count = max(scale // 10, 1)
+    profiles = profiles_document(count)
+    # indexed once per document, as from_json does
+    included = index_included(profiles['included'])
+    yield f'from_json profiles x{count} +included', lambda: (
+        Profile.from_json(profiles)
+    )
+    yield f'from_json profiles x{count} +included compact', lambda: (
+        compact.Profile.from_json(profiles)
+    )
+    yield f'from_json profiles x{count} +included lazy', lambda: (
+        lazy.Profile.from_json(profiles)
+    )
+    linkages = [
+        linkage
+        for item in profiles['data']
+        for relationship in item['relationships'].values()
+        for linkage in relationship['data']
+    ]
+    yield f'map_included profile linkages x{len(linkages)}', lambda: [
+        Profile.map_included(linkage, included) for linkage in linkages
+    ]
+    models = [Profile.to_model(item, []) for item in profiles['data']]
+    yield f'update_relationships profiles x{count}', lambda: [
+        model.update_relationships(item['relationships'], included)
+        for model, item in zip(models, profiles['data'])
+    ]
+
+    bundle_ids = bundle_ids_document(count)
+    yield f'from_json bundleIds x{count} +capabilities', lambda: (
+        BundleId.from_json(bundle_ids)
+    )
+
+
+def measure(func):
+    ''' best time of ROUNDS runs and peak memory of one more traced run '''
+    seconds = float('inf')
+    for _ in range(ROUNDS):
+        started = perf_counter()
+        func()
+        seconds = min(seconds, perf_counter() - started)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': seconds, 'peak_mb': peak / 2 ** 20}
+
+
+def load_baselines():
+    if not path.exists(BASELINES):
+        return {}
+    with open(BASELINES) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.models')
+    parser.add_argument('--scale', type=int, default=10000)
+    parser.add_argument('--save', action='store_true')
+    parser.add_argument('--check', action='store_true')
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    results, regressions = {}, []
+    print(
+        f'{"operation":<48}{"ms":>10}{"peak MB":>10}{"x time":>8}'
+        f'{"x mem":>8}'
+    )
+    for name, func in operations(args.scale):
+        result = results[name] = measure(func)
+        line = (
+            f'{name:<48}{result["seconds"] * 1000:>10.1f}'
+            f'{result["peak_mb"]:>10.1f}'
+        )
+        baseline = baselines.get(name)
+        if baseline:
+            time_ratio = result['seconds'] / baseline['seconds']
+            mem_ratio = result['peak_mb'] / max(baseline['peak_mb'], 0.01)
+            line += f'{time_ratio:>8.2f}{mem_ratio:>8.2f}'
+            if max(time_ratio, mem_ratio) > TOLERANCE:
+                regressions.append(name)
+        print(line)
+
+    if args.save:
+        with open(BASELINES, 'w') as f:
+            json.dump({**baselines, **results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'baselines saved to {BASELINES}')
+    if regressions:
+        print(f'regressed over {TOLERANCE}x: {", ".join(regressions)}')
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+'''Synthetic JSON:API documents shaped like app store connect responses'''
+from base64 import b64encode
+from random import Random
+
+ROOT_URL = 'https://api.appstoreconnect.apple.com/v1'
+
+
+def blob(random: Random, size: int) -> str:
+    data = random.getrandbits(8 * size).to_bytes(size, 'big')
+    return b64encode(data).decode()
+
+
+def device(random: Random, idx: int) -> dict:
+    return {
+        'type': 'devices',
+        'id': f'{idx:010d}',
+        'attributes': {
+            'udid': f'{random.getrandbits(160):040x}',
+            'name': f'test device {idx}',
+            'deviceClass': random.choice(('IPHONE', 'IPAD', 'MAC')),
+            'model': random.choice(('iPhone 11', 'iPad Pro', 'MacBook Pro')),
+            'platform': random.choice(('IOS', 'MAC_OS')),
+            'addedDate': '2019-10-01T08:00:00.000+0000',
+            'status': random.choice(('ENABLED', 'DISABLED')),
+        },
+        'links': {'self': f'{ROOT_URL}/devices/{idx:010d}'},
+    }
+
+
+def certificate(random: Random, idx: int) -> dict:
+    return {
+        'type': 'certificates',
+        'id': f'C{idx:09d}',
+        'attributes': {
+            'serialNumber': f'{random.getrandbits(64):016X}',
+            'name': f'iOS Distribution: Team {idx}',
+            'displayName': f'Team {idx}',
+            'platform': 'IOS',
+            'expirationDate': '2020-10-01T08:00:00.000+0000',
+            'certificateType': 'IOS_DISTRIBUTION',
+            'certificateContent': blob(random, 1400),
+        },
+        'links': {'self': f'{ROOT_URL}/certificates/C{idx:09d}'},
+    }
+
+
+def relationship(type_, ids, self_url):
+    return {
+        'data': [{'type': type_, 'id': rid} for rid in ids],
+        'links': {
+            'self': f'{self_url}/relationships/{type_}',
+            'related': f'{self_url}/{type_}',
+        },
+    }
+
+
+def profile(random: Random, idx: int, devices=(), certificates=()) -> dict:
+    url = f'{ROOT_URL}/profiles/P{idx:09d}'
+    return {
+        'type': 'profiles',
+        'id': f'P{idx:09d}',
+        'attributes': {
+            'uuid': f'{random.getrandbits(128):032x}',
+            'name': f'profile {idx}',
+            'platform': 'IOS',
+            'profileType': 'IOS_APP_ADHOC',
+            'profileContent': blob(random, 12000),
+            'profileState': 'ACTIVE',
+            'createdDate': '2019-10-01T08:00:00.000+0000',
+            'expirationDate': '2020-10-01T08:00:00.000+0000',
+        },
+        'relationships': {
+            'devices': relationship('devices', devices, url),
+            'certificates': relationship('certificates', certificates, url),
+        },
+        'links': {'self': url},
+    }
+
+
+def capability(random: Random, idx: int) -> dict:
+    return {
+        'type': 'bundleIdCapabilities',
+        'id': f'B{idx:09d}_CAP',
+        'attributes': {
+            'capabilityType': random.choice(
+                ('PUSH_NOTIFICATIONS', 'ICLOUD', 'GAME_CENTER', 'MAPS')
+            ),
+            'settings': [],
+        },
+    }
+
+
+def bundle_id(random: Random, idx: int, capabilities=()) -> dict:
+    url = f'{ROOT_URL}/bundleIds/B{idx:09d}'
+    return {
+        'type': 'bundleIds',
+        'id': f'B{idx:09d}',
+        'attributes': {
+            'identifier': f'com.example.app{idx}',
+            'name': f'app {idx}',
+            'platform': 'IOS',
+            'seedId': 'ABCDE12345',
+        },
+        'relationships': {
+            'bundleIdCapabilities': relationship(
+                'bundleIdCapabilities', capabilities, url
+            ),
+        },
+        'links': {'self': url},
+    }
+
+
+def document(data, included=None, total=None, next_url=None) -> dict:
+    doc = {'data': data, 'links': {'self': f'{ROOT_URL}/x'}}
+    if included is not None:
+        doc['included'] = included
+    if next_url:
+        doc['links']['next'] = next_url
+    doc['meta'] = {'paging': {'total': total or len(data), 'limit': len(data)}}
+    return doc
+
+
+def devices_document(count: int, seed: int = 0) -> dict:
+    random = Random(seed)
+    return document([device(random, idx) for idx in range(count)])
+
+
+def profiles_document(
+    count: int, devices: int = 50, certificates: int = 5, seed: int = 0
+) -> dict:
+    '''profiles sharing a pool of included devices and certificates'''
+    random = Random(seed)
+    device_pool = [device(random, idx) for idx in range(devices * 2)]
+    cert_pool = [certificate(random, idx) for idx in range(certificates * 2)]
+    data = [
+        profile(
+            random,
+            idx,
+            [ele['id'] for ele in random.sample(device_pool, devices)],
+            [ele['id'] for ele in random.sample(cert_pool, certificates)],
+        )
+        for idx in range(count)
+    ]
+    return document(data, included=device_pool + cert_pool)
+
+
+def bundle_ids_document(
+    count: int, capabilities: int = 4, seed: int = 0
+) -> dict:
+    random = Random(seed)
+    data, included = [], []
+    for idx in range(count):
+        caps = [capability(random, idx) for _ in range(capabilities)]
+        for num, cap in enumerate(caps):
+            cap['id'] = f'{cap["id"]}{num}'
+        included.extend(caps)
+        data.append(bundle_id(random, idx, [cap['id'] for cap in caps]))
+    return document(data, included=included)
+
+
+def paginate(doc: dict, limit: int = 200) -> list:
+    '''split doc into pages linked by links.next, included kept per page'''
+    data, included = doc['data'], doc.get('included')
+    pages = []
+    for offset in range(0, len(data), limit):
+        next_url = None
+        if offset + limit < len(data):
+            next_url = f'{ROOT_URL}/x?cursor={offset + limit}'
+        pages.append(
+            document(
+                data[offset : offset + limit],
+                included=included,
+                total=len(data),
+                next_url=next_url,
+            )
+        )
+    return pages
@@ -52,6 +52,7 @@ if __name__ == '__main__':
             'Programming Language :: Python :: 3.8',
         ],
         python_requires='>=3.6',
-        packages=find_packages(),
+        packages=find_packages(exclude=('benchmarks', 'benchmarks.*')),
         install_requires=requirements,
+        extras_require={'aio': ['aiohttp==3.6.2']},
     )
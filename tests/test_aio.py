@@ -0,0 +1,52 @@
+import asyncio
+from threading import current_thread, main_thread
+
+import fakeredis
+import pytest
+
+from applied.aio.interface import AsyncBaseInterface
+from applied.backend import RedisBackend
+from applied.emulator import Emulator, Store
+from applied.interface import RateLimiter
+
+
+class RecordingBackend(RedisBackend):
+    ''' remembers the threads the bucket was used from '''
+
+    def __init__(self, ttl):
+        super().__init__(ttl, fakeredis.FakeRedis())
+        self.threads = []
+
+    def take_token(self, *args):
+        self.threads.append(current_thread())
+        return super().take_token(*args)
+
+    def cap_tokens(self, *args):
+        self.threads.append(current_thread())
+        return super().cap_tokens(*args)
+
+
+@pytest.fixture
+def emulator():
+    with Emulator(Store(seed=1)) as emu:
+        yield emu
+
+
+def get_devices(emulator, rate_limiter, count=5):
+    async def run():
+        session = AsyncBaseInterface(rate_limiter=rate_limiter)
+        session.headers['Authorization'] = 'Bearer token'
+        try:
+            for _ in range(count):
+                await session.request('GET', f'{emulator.url}/devices')
+        finally:
+            await session.close()
+
+    asyncio.run(run())
+
+
+def test_shared_rate_limiter_runs_off_the_event_loop(emulator):
+    backend = RecordingBackend(60000)
+    get_devices(emulator, RateLimiter('devices', backend=backend))
+    assert backend.threads
+    assert main_thread() not in backend.threads
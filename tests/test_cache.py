@@ -0,0 +1,49 @@
+import pytest
+
+from applied import error
+from applied.emulator import Emulator, Store
+from applied.interface import PortalSession, ResponseCache
+
+# the emulator wants a bearer token, the portal sends cookies instead
+HEADERS = {'Authorization': 'Bearer token'}
+
+
+@pytest.fixture
+def emulator():
+    with Emulator(Store(seed=1)) as emu:
+        yield emu
+
+
+@pytest.fixture
+def portal():
+    return PortalSession(
+        'user', 'password', None, response_cache=ResponseCache(ttl=600)
+    )
+
+
+def get_name(portal, url):
+    resp = portal.get(url, headers=HEADERS)
+    return portal.load_json(resp)['data']['attributes']['name']
+
+
+def test_portal_writes_drop_cached_responses(emulator, portal):
+    device = emulator.store.find('devices')[0]
+    url = f'{emulator.url}/devices/{device["id"]}'
+    name = get_name(portal, url)
+    requests = emulator.stats['requests']
+    assert get_name(portal, url) == name
+    assert emulator.stats['requests'] == requests
+
+    data = {
+        'type': 'devices',
+        'id': device['id'],
+        'attributes': {'name': 'renamed'},
+    }
+    portal.patch(url, json={'data': data}, headers=HEADERS)
+    assert get_name(portal, url) == 'renamed'
+    assert portal.response_cache.stats['invalidated'] == 1
+
+
+def test_portal_write_errors_are_raised(emulator, portal):
+    with pytest.raises(error.ResourceNotFound):
+        portal.delete(f'{emulator.url}/devices/missing', headers=HEADERS)
@@ -0,0 +1,75 @@
+from threading import Thread
+from time import sleep
+
+import fakeredis
+import pytest
+from requests import Response
+
+from applied.backend import RedisBackend
+from applied.interface.coalesce import SingleFlight
+
+
+def make_resp(content):
+    resp = Response()
+    resp.status_code = 200
+    resp.url = 'https://example.com/v1/devices'
+    resp.encoding = 'utf-8'
+    resp._content = content
+    return resp
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def make_flight(server):
+    ''' SingleFlight of a process of its own, sharing the redis server '''
+    rdb = fakeredis.FakeRedis(server=server)
+    return SingleFlight(RedisBackend(60000, rdb))
+
+
+def lead(flight, content, delay=0.2, fail=False):
+    def fetch():
+        sleep(delay)
+        if fail:
+            raise RuntimeError(content)
+        return make_resp(content)
+
+    def run():
+        try:
+            flight.do('devices', fetch)
+        except RuntimeError:
+            pass
+
+    thread = Thread(target=run)
+    thread.start()
+    # the leader holds the lock before anyone waits
+    sleep(0.05)
+    return thread
+
+
+def test_waiter_gets_the_leader_response(server):
+    leader, waiter = make_flight(server), make_flight(server)
+    thread = lead(leader, b'v1')
+    resp = waiter.do('devices', lambda: make_resp(b'own'))
+    thread.join()
+    assert resp.content == b'v1'
+
+
+def test_waiter_fetches_once_the_leader_fails(server):
+    leader, waiter = make_flight(server), make_flight(server)
+    thread = lead(leader, b'v1', fail=True)
+    resp = waiter.do('devices', lambda: make_resp(b'own'))
+    thread.join()
+    assert resp.content == b'own'
+
+
+def test_former_leader_waits_for_the_new_response(server):
+    first, second = make_flight(server), make_flight(server)
+    thread = lead(first, b'v1')
+    thread.join()
+    thread = lead(second, b'v2')
+    resp = first.do('devices', lambda: make_resp(b'own'))
+    thread.join()
+    assert resp.content == b'v2'
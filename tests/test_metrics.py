@@ -0,0 +1,22 @@
+import pytest
+
+from applied.interface import Metrics
+
+
+@pytest.mark.parametrize(
+    'path, endpoint',
+    [
+        ('/v1/devices', 'GET /v1/devices'),
+        ('/v1/devices/D000000021', 'GET /v1/devices/{id}'),
+        ('/v1/devices/8YG9N45VWX/profiles', 'GET /v1/devices/{id}/profiles'),
+        (
+            '/v1/users/6f1a0c3e-8a4b-4f7e-9c2d-0b1e2a3c4d5e',
+            'GET /v1/users/{id}',
+        ),
+        ('/services/account/12345', 'GET /services/account/{id}'),
+        ('/v1/bundleIds/QH65B2', 'GET /v1/bundleIds/QH65B2'),
+        ('/v2/s3/upload', 'GET /v2/s3/upload'),
+    ],
+)
+def test_endpoint_folds_ids_only(path, endpoint):
+    assert Metrics.endpoint('get', f'https://example.com{path}') == endpoint
@@ -0,0 +1,55 @@
+import fakeredis
+import pytest
+
+from applied.backend import RedisBackend
+from applied.client import Client
+from applied.emulator import Emulator, Store
+from applied.interface import ApiSession
+from applied.models import ModelCache
+
+
+class StaticToken:
+
+    backend = None
+    key_id = 'key'
+
+    def get_cached_token(self):
+        return 'token'
+
+    def get_token(self):
+        return 'token'
+
+    def renew_token(self):
+        return 'token'
+
+
+@pytest.fixture
+def emulator():
+    with Emulator(Store(seed=1)) as emu:
+        yield emu
+
+
+def make_client(emulator, server):
+    ''' client of a process of its own, sharing the redis server '''
+    session = ApiSession(StaticToken())
+    session.ROOT_URL = emulator.url
+    backend = RedisBackend(60000, fakeredis.FakeRedis(server=server))
+    cache = ModelCache(backend, ttls={'devices': 600})
+    return Client(api_session=session, model_cache=cache)
+
+
+def test_write_drops_a_document_stored_by_another_client(emulator):
+    server = fakeredis.FakeServer()
+    first, second = (
+        make_client(emulator, server),
+        make_client(emulator, server),
+    )
+    pk = emulator.store.find('devices')[0]['id']
+    name = first.Device.get(pk).name
+
+    device = second.Device.get(pk)
+    assert device.name == name
+    assert second.model_cache.stats['hits'] == 1
+
+    device.update(name='renamed')
+    assert second.Device.get(pk).name == 'renamed'
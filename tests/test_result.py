@@ -0,0 +1,47 @@
+import pytest
+
+from applied.client import Client
+from applied.emulator import Emulator, Store
+from applied.interface import ApiSession
+
+
+class Token:
+    backend = None
+
+    def get_cached_token(self):
+        return None
+
+    def get_token(self):
+        return 'token'
+
+    def renew_token(self):
+        return 'token'
+
+
+@pytest.fixture
+def client():
+    with Emulator(Store(seed=1, devices=30)) as emu:
+        session = ApiSession(Token())
+        session.ROOT_URL = emu.url
+        yield Client(api_session=session)
+
+
+def test_objects_are_built_after_find(client):
+    result = client.Device.find(limit=20)
+    assert len(result.objects) == 20
+    assert [d.id for d in result] == [d.id for d in result.objects]
+    assert len(result.objects) == 30
+
+
+def test_incremental_objects_are_built_while_iterating(client):
+    result = client.Device.find(limit=20, incremental=True)
+    assert result.objects == []
+    assert result.first() is result.objects[0]
+    assert len(list(result)) == 30
+
+
+def test_export_builds_no_models(client):
+    result = client.Device.find(limit=20)
+    columns = result.to_columns(['udid'])
+    assert len(columns['udid']) == 30
+    assert result.built == []
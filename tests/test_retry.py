@@ -0,0 +1,84 @@
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from time import monotonic
+
+import pytest
+
+from applied import error
+from applied.aio.interface import AsyncApiSession
+from applied.interface import ApiSession, RetryPolicy
+
+
+class Unavailable(BaseHTTPRequestHandler):
+    ''' always busy, asks to be retried in a second '''
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(503)
+        self.send_header('Retry-After', '1')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+
+class Token:
+    backend = None
+
+    def get_cached_token(self):
+        return None
+
+    def get_token(self):
+        return 'token'
+
+    def renew_token(self):
+        return 'token'
+
+
+@pytest.fixture
+def root_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Unavailable)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_timeout_caps_the_deadline():
+    policy = RetryPolicy(max_retries=10, jitter=False, deadline=60)
+    started = monotonic()
+    assert policy.get_delay('GET', 1, started) == 0.5
+    assert policy.get_delay('GET', 1, started, timeout=0.1) is None
+    assert policy.get_delay('GET', 1, started, timeout=10) == 0.5
+
+
+def test_timeout_caps_the_retries(root_url):
+    session = ApiSession(Token(), retry_policy=RetryPolicy(max_retries=10))
+    session.ROOT_URL = root_url
+    started = monotonic()
+    with pytest.raises(error.UnwantedResponse):
+        session.get('/devices', timeout=2.5)
+    assert monotonic() - started < 2.5
+    assert session.retry_policy.retries == 2
+
+
+def test_async_timeout_caps_the_retries(root_url):
+    async def run():
+        session = AsyncApiSession(
+            Token(), retry_policy=RetryPolicy(max_retries=10)
+        )
+        session.ROOT_URL = root_url
+        try:
+            with pytest.raises(error.UnwantedResponse):
+                await session.get('/devices', timeout=2.5)
+        finally:
+            await session.close()
+        return session.retry_policy.retries
+
+    started = monotonic()
+    assert asyncio.run(run()) == 2
+    assert monotonic() - started < 2.5
@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier, Lock
+
+import pytest
+
+from applied.client import Client
+from applied.emulator import Emulator, Store
+from applied.interface import ApiSession
+
+THREADS = 16
+CALLS = 20
+
+
+class CountingToken:
+    ''' ApiToken signing token-{n}, n the number of renewals '''
+
+    backend = None
+    key_id = 'key'
+
+    def __init__(self):
+        self.renewals = 0
+        self.token = 'token-0'
+        self.lock = Lock()
+
+    def get_cached_token(self):
+        return self.token
+
+    def get_token(self):
+        return self.token
+
+    def renew_token(self):
+        with self.lock:
+            self.renewals += 1
+            self.token = f'token-{self.renewals}'
+            return self.token
+
+
+class RecordingEmulator(Emulator):
+    ''' Emulator keeping the Authorization and status of each request '''
+
+    def __init__(self, store):
+        super().__init__(store)
+        self.records = []
+
+    def dispatch(self, method, path, headers, body):
+        status, payload = super().dispatch(method, path, headers, body)
+        with self.lock:
+            self.records.append((headers.get('Authorization'), status))
+        return status, payload
+
+
+@pytest.fixture
+def emulator():
+    with RecordingEmulator(Store(seed=1)) as emu:
+        yield emu
+
+
+def test_shared_client_renews_once(emulator):
+    token = CountingToken()
+    session = ApiSession(token, pool_maxsize=THREADS, pool_block=True)
+    session.ROOT_URL = emulator.url
+    client = Client(api_session=session)
+    ids = [device.id for device in client.Device.find(limit=THREADS)]
+    emulator.expire_tokens()
+    del emulator.records[:]
+
+    barrier = Barrier(THREADS)
+
+    def work(idx):
+        barrier.wait()
+        return [
+            client.Device.get(ids[(idx + call) % len(ids)]).id
+            for call in range(CALLS)
+        ]
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        futures = [pool.submit(work, idx) for idx in range(THREADS)]
+        results = [future.result() for future in futures]
+
+    assert token.renewals == 1
+    for idx, got in enumerate(results):
+        assert got == [ids[(idx + call) % len(ids)] for call in range(CALLS)]
+    statuses = {}
+    for authorization, status in emulator.records:
+        statuses.setdefault(authorization, set()).add(status)
+    # the expired token is only answered 401, every request signed after
+    # the renewal goes through, and no request went out unsigned
+    assert statuses == {'Bearer token-0': {401}, 'Bearer token-1': {200}}
+    assert (
+        sum(1 for auth, _ in emulator.records if auth == 'Bearer token-1')
+        == THREADS * CALLS
+    )
+    # authorization is set per request, never on the shared session
+    assert 'Authorization' not in session.session.headers